@@ -0,0 +1,37 @@
+"""
+async helpers on every supported django and asgiref version.
+
+the async queryset methods (django 4.1+) are used when available,
+older versions run the same query in a thread with sync_to_async.
+"""
+from asgiref.sync import sync_to_async
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+    import asyncio
+    from asyncio import iscoroutinefunction  # noqa
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+
+async def fetch(queryset):
+    "the rows of the queryset as a list."
+    if hasattr(queryset, "__aiter__"):
+        return [row async for row in queryset]
+    return await sync_to_async(list)(queryset)
+
+
+async def fetch_one(queryset, **lookup):
+    "queryset.get(**lookup), raising DoesNotExist the same way."
+    if hasattr(queryset, "aget"):
+        return await queryset.aget(**lookup)
+    return await sync_to_async(queryset.get)(**lookup)
+
+
+async def aggregate(queryset, **aggregates):
+    if hasattr(queryset, "aaggregate"):
+        return await queryset.aaggregate(**aggregates)
+    return await sync_to_async(queryset.aggregate)(**aggregates)
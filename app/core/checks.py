@@ -0,0 +1,39 @@
+import importlib.util
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.checks import Error, register
+
+
+@register()
+def check_password_hasher(app_configs, **kwargs):
+    "the library of the preferred password hasher must be installed."
+    hasher = get_hasher()
+    if getattr(hasher, "library", None) is None:
+        return []
+    try:
+        hasher._load_library()
+    except ValueError as exc:
+        return [Error(
+            str(exc),
+            hint="Install it or choose another PASSWORD_HASHER_PROFILE.",
+            id="core.E001")]
+    return []
+
+
+@register()
+def check_connection_pool(app_configs, **kwargs):
+    "connection pools need django 5.1 with psycopg 3 and psycopg_pool."
+    errors = []
+    for alias, database in settings.DATABASES.items():
+        if not database.get("OPTIONS", {}).get("pool"):
+            continue
+        if (django.VERSION < (5, 1)
+                or importlib.util.find_spec("psycopg") is None
+                or importlib.util.find_spec("psycopg_pool") is None):
+            errors.append(Error(
+                f"The connection pool of the {alias!r} database needs "
+                "Django 5.1 or later with psycopg[pool].",
+                hint="Install them or unset DB_POOL.",
+                id="core.E002"))
+    return errors
@@ -0,0 +1,104 @@
+"""
+per view request metrics.
+
+MetricsMiddleware records, for every resolved view name, the
+request count, duration, database queries and their time, time
+spent building serializer data, response rendering time and
+response size. totals are kept per process and
+exposed in the prometheus text format by core.views.metrics.
+"""
+import threading
+from collections import defaultdict
+
+# upper bounds of the request duration histogram, in seconds.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name, type and help text of the totals, in the order of the export.
+COUNTERS = (
+    ("api_requests_total", "counter", "Requests answered."),
+    ("api_db_queries_total", "counter", "Database queries executed."),
+    ("api_db_seconds_total", "counter", "Time spent in database queries."),
+    ("api_serialize_seconds_total", "counter",
+     "Time spent building serializer data."),
+    ("api_render_seconds_total", "counter",
+     "Time spent rendering response bodies."),
+    ("api_response_bytes_total", "counter",
+     "Response body bytes, streaming responses excluded."),
+)
+
+
+class ViewMetrics:
+    "totals of the requests of one view and method."
+
+    def __init__(self):
+        self.totals = {name: 0 for name, kind, text in COUNTERS}
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.duration = 0.0
+
+
+class Registry:
+    "thread safe per process totals, keyed by view name and method."
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = defaultdict(ViewMetrics)
+
+    def record(self, view, method, duration, queries, sql_seconds,
+               serialize_seconds, render_seconds, size):
+        with self.lock:
+            metrics = self.views[(view, method)]
+            totals = metrics.totals
+            totals["api_requests_total"] += 1
+            totals["api_db_queries_total"] += queries
+            totals["api_db_seconds_total"] += sql_seconds
+            totals["api_serialize_seconds_total"] += serialize_seconds
+            totals["api_render_seconds_total"] += render_seconds
+            totals["api_response_bytes_total"] += size
+            metrics.duration += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    metrics.buckets[index] += 1
+
+    def export(self):
+        "the totals in the prometheus text exposition format."
+        with self.lock:
+            views = sorted(
+                (key, metrics.totals.copy(), list(metrics.buckets),
+                 metrics.duration)
+                for key, metrics in self.views.items())
+        lines = []
+        for name, kind, text in COUNTERS:
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, totals, buckets, duration in views:
+                lines.append(f"{name}{{{labels(*key)}}} {totals[name]:g}")
+        name = "api_request_duration_seconds"
+        lines.append(f"# HELP {name} Request duration.")
+        lines.append(f"# TYPE {name} histogram")
+        for key, totals, buckets, duration in views:
+            label_text = labels(*key)
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                lines.append(
+                    f'{name}_bucket{{{label_text},le="{bound:g}"}} {count}')
+            count = totals["api_requests_total"]
+            lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{label_text}}} {duration:g}")
+            lines.append(f"{name}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace(
+        "\n", "\\n")
+
+
+def labels(view, method):
+    return f'view="{escape(view)}",method="{escape(method)}"'
+
+
+registry = Registry()
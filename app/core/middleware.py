@@ -0,0 +1,155 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from .aio import iscoroutinefunction, markcoroutinefunction
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# statements listed in the slow request log, slowest first.
+SLOW_LOG_STATEMENTS = 5
+
+# recorder of the request being handled. context variables follow
+# the request into the threads of sync_to_async, so queries of
+# async views are recorded too.
+current_recorder = ContextVar("current_recorder", default=None)
+
+
+class QueryRecorder:
+    """
+    counts and times the queries of a request, and times its
+    serializers (see record_serialization).
+    statements are kept for the slow request log, without their
+    parameters.
+    """
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.keep_sql = keep_sql
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if self.keep_sql:
+                self.statements.append((elapsed, sql))
+
+
+def record_query(execute, sql, params, many, context):
+    "execute wrapper passing queries to the current recorder."
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@contextmanager
+def record_serialization():
+    "adds the time spent in the block to the serialization time."
+    recorder = current_recorder.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if recorder is not None:
+            recorder.serialize_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver adding record_query to the
+    connection. it goes first, connection.execute_wrapper() blocks
+    pop the last wrapper when they exit.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class MetricsMiddleware:
+    """
+    record per view request metrics in core.metrics.registry.
+
+    the serialization time is the time serializers built with
+    core.serializers.MeasuredDataMixin spent building their data,
+    the rendering time is measured around the rendering of template
+    and rest framework responses (async views render in the view,
+    their rendering time is 0). queries of streaming responses run
+    after the middleware returned and are not counted. requests
+    slower than METRICS_SLOW_REQUEST_MS are logged with their
+    slowest statements.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, start)
+        return response
+
+    async def __acall__(self, request):
+        recorder, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, start)
+        return response
+
+    def start(self, request):
+        slow_ms = getattr(settings, "METRICS_SLOW_REQUEST_MS", 0)
+        recorder = QueryRecorder(keep_sql=bool(slow_ms))
+        request.metrics_render_seconds = 0.0
+        return recorder, current_recorder.set(recorder), time.perf_counter()
+
+    def finish(self, request, response, recorder, start):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        registry.record(
+            view, request.method, duration, recorder.count, recorder.seconds,
+            recorder.serialize_seconds, request.metrics_render_seconds,
+            0 if response.streaming else len(response.content))
+        slow_ms = getattr(settings, "METRICS_SLOW_REQUEST_MS", 0)
+        if slow_ms and duration * 1000 >= slow_ms:
+            self.log_slow_request(request, view, duration, recorder)
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.metrics_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def log_slow_request(self, request, view, duration, recorder):
+        statements = sorted(
+            recorder.statements, key=lambda statement: statement[0],
+            reverse=True)[:SLOW_LOG_STATEMENTS]
+        logger.warning(
+            "Slow request %s %s (%s) took %.1f ms, %d queries in %.1f ms.%s",
+            request.method, request.path, view, duration * 1000,
+            recorder.count, recorder.seconds * 1000, "".join(
+                f"\n  {elapsed * 1000:.1f} ms  {sql}"
+                for elapsed, sql in statements))
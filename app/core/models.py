@@ -1,6 +1,11 @@
-from django.db import models
+import hashlib
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import UserManager as BaseUserManager
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 # Create your models here.
@@ -57,3 +62,74 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+
+def token_digest(key):
+    "sha256 of a token key, the form keys are stored in."
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class DeviceTokenManager(models.Manager):
+    """
+    Manager of device tokens.
+    """
+
+    def issue(self, user, device=""):
+        """
+        returns a (token, key) pair for the device of the user.
+        the device's previous token is replaced, past
+        DEVICE_TOKEN_MAX_DEVICES the oldest devices are signed out.
+        only the digest of the key is stored.
+        """
+        key = secrets.token_hex(20)
+        now = timezone.now()
+        ttl = getattr(settings, "DEVICE_TOKEN_TTL", 30 * 24 * 3600)
+        with transaction.atomic(using=self.db):
+            token, created = self.update_or_create(
+                user=user, device=device, defaults={
+                    "digest": token_digest(key),
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=ttl)})
+            max_devices = getattr(settings, "DEVICE_TOKEN_MAX_DEVICES", 10)
+            stale = self.filter(user=user).order_by(
+                "-created_at", "-pk").values_list("pk", flat=True)[
+                    max_devices:]
+            self.filter(pk__in=list(stale)).delete()
+        return token, key
+
+    def get_by_key(self, key):
+        "the unexpired token of a key, raising DoesNotExist otherwise."
+        return self.select_related("user").get(
+            digest=token_digest(key), expires_at__gt=timezone.now())
+
+
+class DeviceToken(models.Model):
+    """
+    Expiring authentication token of one device of a user.
+    Keys are only kept as their sha256 digest.
+    """
+
+    digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="device_tokens")
+    device = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = DeviceTokenManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "device"],
+                name="core_devicetoken_device_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.device}".strip()
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
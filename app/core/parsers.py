@@ -0,0 +1,30 @@
+import codecs
+import io
+from django.conf import settings
+from rest_framework import parsers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    json parser using orjson when installed.
+    bodies orjson rejects are parsed again by rest framework's
+    JSONParser, which accepts big integers and reports the errors.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict \
+                or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,84 @@
+"""
+json renderers on the fastest json library installed.
+
+orjson is preferred, then ujson. without either, responses are
+rendered by the standard library through rest framework's own
+JSONRenderer. rendered api responses are the same bytes either way.
+"""
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# types the fast encoders do not know (Decimal, lazy strings) are
+# converted like rest framework does. datetimes are passed through
+# to it as well, orjson would format them differently.
+_encoder = encoders.JSONEncoder()
+
+
+def dumps(data):
+    "compact utf-8 json, None when no fast encoder can render the data."
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_encoder.default, option=(
+                orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS))
+        except TypeError:
+            return None
+    if ujson is not None:
+        try:
+            # escaped slashes would mangle image urls.
+            return ujson.dumps(
+                data, ensure_ascii=False, escape_forward_slashes=False,
+                allow_nan=False, default=_encoder.default).encode()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    json renderer using orjson or ujson when installed.
+    indented output (browsable api, indent media type parameter)
+    and non default COMPACT_JSON / UNICODE_JSON settings fall back
+    to the standard library, as does data the fast encoders reject.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if self.compact and not self.ensure_ascii and indent is None:
+            ret = dumps(data)
+            if ret is not None:
+                # the same javascript safe escapes as JSONRenderer.
+                return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                    b'\xe2\x80\xa9', b'\\u2029')
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    newline delimited json, one compact line per item of a list.
+    other data (error responses) is rendered as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        lines = []
+        for item in data:
+            lines.append(super().render(item))
+        lines.append(b'')
+        return b'\n'.join(lines)
@@ -0,0 +1,14 @@
+from .middleware import record_serialization
+
+
+class MeasuredDataMixin:
+    """
+    serializer mixin adding the time spent building .data to the
+    serialization time of the request metrics. goes before the
+    rest framework serializer class in the bases.
+    """
+
+    @property
+    def data(self):
+        with record_serialization():
+            return super().data
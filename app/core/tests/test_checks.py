@@ -0,0 +1,26 @@
+from unittest.mock import patch
+from django.conf import settings
+from django.test import SimpleTestCase
+from ..checks import check_connection_pool
+
+
+class ConnectionPoolCheckTests(SimpleTestCase):
+    """
+    Tests for the connection pool system check.
+    """
+
+    def test_no_pool(self):
+        """
+        Test databases without a pool pass.
+        """
+        self.assertEqual(check_connection_pool(None), [])
+
+    def test_missing_pool_library(self):
+        """
+        Test a pool without psycopg_pool is reported.
+        """
+        options = settings.DATABASES['default'].setdefault('OPTIONS', {})
+        with patch.dict(options, {'pool': {'max_size': 4}}), \
+                patch('importlib.util.find_spec', return_value=None):
+            errors = check_connection_pool(None)
+        self.assertEqual([error.id for error in errors], ['core.E002'])
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.metrics import registry
+
+METRICS_URL = reverse('metrics')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class MetricsTests(TestCase):
+    "test the per view metrics middleware and endpoint."
+
+    def setUp(self):
+        registry.reset()
+        self.user = get_user_model().objects.create_user(
+            email="metrics@test.com", password="superpass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_records_view_metrics(self):
+        "queries, rendering and size are recorded per view name."
+        res = self.client.get(TAGS_URL)
+
+        metrics = registry.views[('recipe:tag-list', 'GET')]
+        self.assertEqual(metrics.totals['api_requests_total'], 1)
+        self.assertGreater(metrics.totals['api_db_queries_total'], 0)
+        self.assertGreater(metrics.totals['api_serialize_seconds_total'], 0)
+        self.assertGreater(metrics.totals['api_render_seconds_total'], 0)
+        self.assertEqual(
+            metrics.totals['api_response_bytes_total'], len(res.content))
+
+    def test_export_prometheus_text(self):
+        "allowed addresses get the metrics as prometheus text."
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="127.0.0.1")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn(
+            'api_requests_total{view="recipe:tag-list",method="GET"} 1',
+            text)
+        self.assertIn(
+            'api_request_duration_seconds_bucket{view="recipe:tag-list",'
+            'method="GET",le="+Inf"} 1', text)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"])
+    def test_export_allowlist(self):
+        "other addresses than the allowed networks get a 404."
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="127.0.0.1")
+        self.assertEqual(res.status_code, 404)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0.001)
+    def test_slow_request_log(self):
+        "slow requests are logged with their sql."
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(TAGS_URL)
+
+        self.assertIn('recipe:tag-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
@@ -0,0 +1,87 @@
+import datetime
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+from django.test import TestCase
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core import parsers, renderers
+
+
+SAMPLE = {
+    "results": [{
+        "id": 1,
+        "name": "Crème brûlée\u2028",
+        "price": Decimal("12.50"),
+        "image": "http://testserver/media/uploads/recipe/ab/ab.jpg",
+        "tags": [1, 2],
+        "link": None,
+        "updated_at": datetime.datetime(
+            2020, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+        "detail": _("Not found."),
+        7: True,
+    }],
+    "next": None,
+}
+
+
+class FastJSONRendererTests(TestCase):
+    "test the fast json renderer matches the standard one."
+
+    def test_render_matches_json_renderer(self):
+        "decimals, urls, dates and unicode render the same bytes."
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE))
+
+    def test_render_without_fast_encoder(self):
+        "the standard library renders when no fast encoder is installed."
+        with patch.object(renderers, "orjson", None), \
+                patch.object(renderers, "ujson", None):
+            self.assertEqual(
+                renderers.FastJSONRenderer().render(SAMPLE),
+                JSONRenderer().render(SAMPLE))
+
+    def test_render_indented(self):
+        "indented output is left to the standard renderer."
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(
+                SAMPLE, "application/json; indent=4"),
+            JSONRenderer().render(SAMPLE, "application/json; indent=4"))
+
+
+class NDJSONRendererTests(TestCase):
+    "test the newline delimited json renderer."
+
+    def test_render_lines(self):
+        "every item is one compact json line, indent is ignored."
+        items = SAMPLE["results"] * 2
+        expected = JSONRenderer().render(items[0]) + b"\n"
+        self.assertEqual(
+            renderers.NDJSONRenderer().render(
+                items, "application/x-ndjson; indent=4"), expected * 2)
+        self.assertEqual(
+            renderers.NDJSONRenderer().render(items[0]), expected)
+        self.assertEqual(renderers.NDJSONRenderer().render([]), b"")
+
+
+class FastJSONParserTests(TestCase):
+    "test the fast json parser."
+
+    def parse(self, body):
+        return parsers.FastJSONParser().parse(BytesIO(body))
+
+    def test_parse(self):
+        "bodies parse like the standard parser."
+        body = '{"name": "Crème", "tags": [1, 2], "big": 18446744073709551616}'
+        self.assertEqual(
+            self.parse(body.encode()),
+            JSONParser().parse(BytesIO(body.encode())))
+
+    def test_parse_errors(self):
+        "malformed bodies and non finite numbers are rejected."
+        for body in (b'{"name": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
@@ -0,0 +1,27 @@
+import ipaddress
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from .metrics import registry
+
+
+def is_allowed(address):
+    "is the address in one of the METRICS_ALLOWED_IPS networks."
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, "METRICS_ALLOWED_IPS", ()))
+
+
+def metrics(request):
+    """
+    per view metrics in the prometheus text format. other clients
+    than the allowed addresses get a 404, the endpoint stays hidden.
+    """
+    if not is_allowed(request.META.get("REMOTE_ADDR", "")):
+        raise Http404
+    return HttpResponse(
+        registry.export(),
+        content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,3 +1,4 @@
 from .manage_tags import ManageTagViewSet  # noqa
 from .manage_ingredients import ManageIngredient  # noqa
 from .manage_recipes import ManageRecipe  # noqa
+from .export_recipes import ExportRecipes  # noqa
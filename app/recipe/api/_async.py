@@ -0,0 +1,153 @@
+"""
+async read path of the recipe api viewsets.
+
+with RECIPE_ASYNC_VIEWS set, the list and retrieve actions are
+served by coroutines (see recipe.routers.AsyncReadRouter). tokens
+come from the token cache or the async orm, conditional requests
+and cached responses are answered on the event loop and pages are
+read with the async orm. every other action runs the sync viewset
+in a thread, like any sync view under ASGI.
+"""
+from functools import partial
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions
+from rest_framework.response import Response
+from core.aio import fetch_one
+
+
+class AsyncReadMixin:
+    """
+    async list and retrieve actions for viewsets built from
+    ConditionalGetMixin, CachedResponseMixin and RowListMixin.
+    filter backends with an afilter_queryset coroutine are awaited,
+    the others must not query the database.
+    """
+    async_actions = ("list", "retrieve")
+
+    @classmethod
+    def as_async_view(cls, actions, **initkwargs):
+        "async view of the viewset for the method to action map."
+        actions = dict(actions)
+        if "get" in actions and "head" not in actions:
+            actions["head"] = actions["get"]
+        sync_view = sync_to_async(cls.as_view(actions, **initkwargs))
+
+        async def view(request, *args, **kwargs):
+            if actions.get(request.method.lower()) not in cls.async_actions:
+                return await sync_view(request, *args, **kwargs)
+            # set up the instance as ViewSetMixin.as_view does, so
+            # allowed_methods and the browsable api see the handlers.
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = actions
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        "dispatch of the async actions, as in APIView.dispatch."
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        response = self.finalize_response(request, response, *args, **kwargs)
+        return await self.arender_response(response)
+
+    async def aperform_authentication(self, request):
+        """
+        authenticate like Request.user does. authenticators without
+        an aauthenticate coroutine run in a thread.
+        """
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, "aauthenticate", None)
+            if authenticate is None:
+                authenticate = sync_to_async(authenticator.authenticate)
+            try:
+                user_auth = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+        request._not_authenticated()
+
+    async def arender_response(self, response):
+        """
+        render on the event loop and return a plain response, the
+        async handler would render template responses in a thread.
+        the browsable api renders forms from queries, in a thread.
+        """
+        if not hasattr(response, "render"):
+            return response
+        if response.accepted_renderer.format == "json":
+            response.render()
+        else:
+            await sync_to_async(response.render)()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+    async def afilter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            backend = backend()
+            if hasattr(backend, "afilter_queryset"):
+                queryset = await backend.afilter_queryset(
+                    self.request, queryset, self)
+            else:
+                queryset = backend.filter_queryset(
+                    self.request, queryset, self)
+        return queryset
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self)
+
+    async def aget_object(self):
+        "get_object with the async orm."
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await fetch_one(queryset, **{
+                self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError,
+                ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aretrieve_object(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def alist(self, request, *args, **kwargs):
+        handler = partial(self.acached_response, self.alist_rows)
+        return await self.aconditional_response(
+            handler, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        handler = partial(self.acached_response, self.aretrieve_object)
+        return await self.aconditional_response(
+            handler, request, *args, **kwargs)
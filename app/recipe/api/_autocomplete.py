@@ -0,0 +1,44 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from ..autocomplete import complete
+
+
+class AutocompleteMixin:
+    """
+    typeahead over the names of the owned objects.
+
+    GET autocomplete/?prefix=sug&limit=10    prefix may also be sent as q
+
+    answers the first names in alphabetical order,
+    as a list of {"id": ..., "name": ...} objects.
+    """
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    def get_autocomplete_limit(self, request):
+        value = request.query_params.get("limit")
+        if value in (None, ""):
+            return self.autocomplete_limit
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= self.autocomplete_max_limit:
+            raise serializers.ValidationError(
+                {"limit": [_('Expected a number between 1 and {max_limit}.')
+                           .format(max_limit=self.autocomplete_max_limit)]})
+        return limit
+
+    @action(methods=["GET"], detail=False)
+    def autocomplete(self, request, *args, **kwargs):
+        prefix = request.query_params.get(
+            "prefix", request.query_params.get("q", "")).strip()
+        if not prefix:
+            raise serializers.ValidationError(
+                {"prefix": [_('This field is required.')]})
+        matches = complete(
+            self.get_queryset(), request.user.pk, prefix,
+            self.get_autocomplete_limit(request))
+        return Response([{"id": pk, "name": name} for pk, name in matches])
@@ -1,19 +1,212 @@
+import hashlib
+from calendar import timegm
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import (
     viewsets,
     mixins,
-    permissions,
-    authentication)
+    permissions)
+from rest_framework.response import Response
+from core.aio import aggregate, fetch
+from user.authentication import CachedTokenAuthentication
+from .. import cache
+from ..rows import aattach_relations, attach_relations, select_rows
+from ..pagination import OwnerCursorPagination
+from ._async import AsyncReadMixin
+from ._autocomplete import AutocompleteMixin
+from ._bulk import BulkMixin
 
 
-class ListCreateViewSet(viewsets.GenericViewSet,
+class ConditionalGetMixin:
+    """
+    answers conditional GET requests with 304 Not Modified
+    before any serialization happens.
+    the validators come from one aggregate query over the
+    updated_at column of the requested objects.
+    collections only get the etag: deleting a row that is not the
+    newest leaves max(updated_at) as it was, only the count changes.
+    """
+    conditional_actions = ("list",)
+    last_modified_actions = ("retrieve",)
+
+    def get_conditional_queryset(self):
+        "objects the response is built from."
+        queryset = self.get_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validator_aggregates(self):
+        return {"last_modified": Max("updated_at"), "count": Count("pk")}
+
+    def get_validators(self, request):
+        "returns the etag and last modified timestamp of the response."
+        state = self.get_conditional_queryset().order_by().aggregate(
+            **self.get_validator_aggregates())
+        return self.make_validators(request, state)
+
+    async def aget_validators(self, request):
+        state = await aggregate(
+            self.get_conditional_queryset().order_by(),
+            **self.get_validator_aggregates())
+        return self.make_validators(request, state)
+
+    def make_validators(self, request, state):
+        last_modified = None
+        if (self.action in self.last_modified_actions
+                and state["last_modified"] is not None):
+            last_modified = timegm(state["last_modified"].utctimetuple())
+        etag = hashlib.md5(":".join(str(part) for part in (
+            request.user.pk, request.get_full_path(),
+            state["count"], state["last_modified"])).encode()).hexdigest()
+        return quote_etag(etag), last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        "returns 304 when the client copy is fresh, calls handler if not."
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        self.validator_etag = etag
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, handler, request, *args, **kwargs):
+        "conditional_response of async handlers."
+        if self.action not in self.conditional_actions:
+            return await handler(request, *args, **kwargs)
+        etag, last_modified = await self.aget_validators(request)
+        self.validator_etag = etag
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+
+class CachedResponseMixin:
+    """
+    caches the responses of read actions per user.
+    entries are keyed by the user's version token, which is bumped
+    by the model signals on every write of the user's objects.
+    the token is only shared by the processes of a shared cache
+    backend, so actions that are also conditional are keyed by the
+    etag computed from the database too: a process that missed a
+    bump can not serve an entry older than the data.
+    """
+    cached_actions = ("list",)
+    validator_etag = None
+
+    def get_cache_key(self, request):
+        "cache key of the response. includes the query string."
+        return cache.response_key(
+            request.user.pk, self.basename, self.action,
+            request.get_full_path(), self.validator_etag)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        "serve the response from cache or store the fresh one."
+        if self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get_response_data(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set_response_data(key, response.data)
+        return response
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """
+        cached_response of async handlers. the cache is read in
+        place, it is in process memory unless configured otherwise.
+        """
+        if self.action not in self.cached_actions:
+            return await handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get_response_data(key)
+        if data is not None:
+            return Response(data)
+        response = await handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set_response_data(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, request, *args, **kwargs)
+
+
+class RowListMixin:
+    """
+    list action reading plain rows instead of model instances.
+    only the rendered columns are selected, many related primary
+    keys are attached per page. serializers that render anything
+    but plain fields are listed from instances.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer_class = self.get_serializer_class()
+        rows = select_rows(queryset, serializer_class)
+        if rows is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(rows)
+        rows = attach_relations(
+            list(rows if page is None else page), queryset.model,
+            serializer_class, queryset.db)
+        return self.row_response(rows, page)
+
+    async def alist_rows(self, request, *args, **kwargs):
+        "list with the rows read by the async orm."
+        queryset = await self.afilter_queryset(self.get_queryset())
+        serializer_class = self.get_serializer_class()
+        rows = select_rows(queryset, serializer_class)
+        if rows is None:
+            return await sync_to_async(super().list)(
+                request, *args, **kwargs)
+        page = await self.apaginate_queryset(rows)
+        rows = await aattach_relations(
+            await fetch(rows) if page is None else page, queryset.model,
+            serializer_class, queryset.db)
+        return self.row_response(rows, page)
+
+    def row_response(self, rows, page):
+        serializer = self.get_serializer(rows, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+
+class ListCreateViewSet(ConditionalGetMixin, CachedResponseMixin,
+                        AutocompleteMixin, BulkMixin, RowListMixin,
+                        AsyncReadMixin, viewsets.GenericViewSet,
                         mixins.ListModelMixin, mixins.CreateModelMixin):
     """
     base viewset for listing and creating endpoints
     uses token authentication.
     and accepts authenticated user requests.
     """
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = OwnerCursorPagination
 
     def get_queryset(self):
         "filter the queryset with authenticated user"
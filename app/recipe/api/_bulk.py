@@ -0,0 +1,215 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.response import Response
+from .. import cache
+from ..models import Recipe
+from ..serializers import OwnerUniqueNameMixin
+from ..signals import touch_related_recipes
+
+
+class BulkMixin:
+    """
+    bulk create, update and delete of the owned objects.
+    every item is validated first, nothing is written unless
+    all items are valid. rows and many to many through rows are
+    inserted with bulk queries inside a single transaction.
+
+    POST   bulk/  [{...}, {...}]           create objects
+    PATCH  bulk/  [{"id": 1, ...}, ...]    partially update objects
+    DELETE bulk/  [1, 2, ...]              delete objects
+
+    invalid requests are answered with a list of errors,
+    one entry per submitted item.
+    """
+
+    def get_bulk_items(self, request):
+        "validate the request body is a list within the size limit."
+        items = request.data
+        max_items = getattr(settings, "RECIPE_BULK_MAX_ITEMS", 500)
+        if not isinstance(items, list) or not items:
+            raise serializers.ValidationError(
+                _('Expected a non empty list of items.'))
+        if len(items) > max_items:
+            raise serializers.ValidationError(
+                _('Ensure there are no more than {max_items} items.')
+                .format(max_items=max_items))
+        return items
+
+    def to_pks(self, values):
+        "coerce submitted ids to primary keys. invalid ids become None."
+        pk_field = self.get_queryset().model._meta.pk
+        pks = []
+        for value in values:
+            try:
+                if isinstance(value, (bool, dict, list)):
+                    raise TypeError
+                pks.append(pk_field.to_python(value))
+            except (TypeError, ValueError, DjangoValidationError):
+                pks.append(None)
+        return pks
+
+    def get_many_to_many_fields(self):
+        return {
+            field.name: field
+            for field in self.get_queryset().model._meta.many_to_many}
+
+    def split_relations(self, validated_data):
+        "separate many to many values from the column values."
+        m2m_fields = self.get_many_to_many_fields()
+        data = dict(validated_data)
+        relations = {
+            name: data.pop(name) for name in list(data)
+            if name in m2m_fields}
+        return data, relations
+
+    def bulk_set_relations(self, instances, relations, replace=False):
+        "write the through rows of all instances, one query per field."
+        for name, field in self.get_many_to_many_fields().items():
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            changed = [
+                (instance, related[name])
+                for instance, related in zip(instances, relations)
+                if name in related]
+            if not changed:
+                continue
+            if replace:
+                through.objects.filter(**{
+                    f"{source}__in": [pair[0].pk for pair in changed]
+                }).delete()
+            through.objects.bulk_create([
+                through(**{source: instance.pk, target: obj.pk})
+                for instance, objects in changed
+                for obj in dict.fromkeys(objects)])
+
+    def add_duplicate_name_errors(self, serializers_, errors):
+        """
+        items are validated one by one, against the names already
+        stored only. with RECIPE_UNIQUE_NAMES_PER_OWNER, names given
+        again by a later item of the request are rejected too,
+        ignoring case.
+        """
+        if not getattr(settings, "RECIPE_UNIQUE_NAMES_PER_OWNER", False):
+            return
+        seen = set()
+        for serializer, error in zip(serializers_, errors):
+            if (error or not isinstance(serializer, OwnerUniqueNameMixin)
+                    or "name" not in serializer.validated_data):
+                continue
+            name = serializer.validated_data["name"].casefold()
+            if name in seen:
+                error["name"] = [ErrorDetail(
+                    str(serializer.unique_name_message), code="unique")]
+            seen.add(name)
+
+    def bulk_response(self, instances, status_code):
+        "serialize the written instances with their relations."
+        for instance in instances:
+            instance.__dict__.pop("_prefetched_objects_cache", None)
+        prefetch_related_objects(
+            instances, *self.get_many_to_many_fields())
+        serializer = self.get_serializer(instances, many=True)
+        return Response(serializer.data, status=status_code)
+
+    @action(methods=["POST", "PATCH", "DELETE"], detail=False,
+            url_path="bulk")
+    def bulk(self, request, *args, **kwargs):
+        "dispatch the bulk request by method."
+        items = self.get_bulk_items(request)
+        handler = {
+            "POST": self.bulk_create,
+            "PATCH": self.bulk_update,
+            "DELETE": self.bulk_destroy,
+        }[request.method]
+        response = handler(request, items)
+        if status.is_success(response.status_code):
+            # bulk queries do not send the model signals.
+            cache.bump_user_version(request.user.pk)
+        return response
+
+    def bulk_create(self, request, items):
+        serializers_ = [self.get_serializer(data=item) for item in items]
+        errors = [
+            {} if serializer.is_valid() else serializer.errors
+            for serializer in serializers_]
+        self.add_duplicate_name_errors(serializers_, errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.get_queryset().model
+        instances, relations = [], []
+        for serializer in serializers_:
+            data, related = self.split_relations(serializer.validated_data)
+            instances.append(model(owner=request.user, **data))
+            relations.append(related)
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+            self.bulk_set_relations(instances, relations)
+        return self.bulk_response(instances, status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, items):
+        ids = self.to_pks(
+            item.get("id") if isinstance(item, dict) else None
+            for item in items)
+        objects = self.get_queryset().in_bulk(
+            [pk for pk in ids if pk is not None])
+
+        serializers_, errors = [], []
+        for pk, item in zip(ids, items):
+            instance = objects.get(pk)
+            if instance is None:
+                serializers_.append(None)
+                errors.append({"id": [_('Not found.')]})
+                continue
+            serializer = self.get_serializer(
+                instance, data=item, partial=True)
+            serializers_.append(serializer)
+            errors.append({} if serializer.is_valid() else serializer.errors)
+        self.add_duplicate_name_errors(serializers_, errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.get_queryset().model
+        now = timezone.now()
+        instances, relations, fields = [], [], {"updated_at"}
+        for serializer in serializers_:
+            instance = serializer.instance
+            data, related = self.split_relations(serializer.validated_data)
+            for attr, value in data.items():
+                setattr(instance, attr, value)
+            instance.updated_at = now
+            fields.update(data)
+            instances.append(instance)
+            relations.append(related)
+        with transaction.atomic():
+            model.objects.bulk_update(instances, sorted(fields))
+            self.bulk_set_relations(instances, relations, replace=True)
+            if model is not Recipe:
+                # recipe representations include the tag and ingredient
+                # names, the save signals touching them are not sent.
+                touch_related_recipes(
+                    model, [instance.pk for instance in instances])
+        return self.bulk_response(instances, status.HTTP_200_OK)
+
+    def bulk_destroy(self, request, items):
+        ids = self.to_pks(items)
+        objects = self.get_queryset().in_bulk(
+            [pk for pk in ids if pk is not None])
+        errors = [
+            {} if pk in objects else {"id": [_('Not found.')]}
+            for pk in ids]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            self.get_queryset().model.objects.filter(
+                pk__in=list(objects)).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,79 @@
+from itertools import islice
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+from core.renderers import FastJSONRenderer, NDJSONRenderer
+from user.authentication import CachedTokenAuthentication
+from ..models import Tag, Ingredient, Recipe
+from ..serializers import RecipeExportSerializer
+
+
+class ExportRecipes(APIView):
+    """
+    streams the authenticated user's cookbook as newline delimited
+    json, one recipe with its tags and ingredients per line.
+    recipes are read with a server side cursor and serialized chunk
+    by chunk, so memory use does not grow with the cookbook.
+    under ASGI the stream is an async iterator reading each chunk in
+    a thread, the handler would read a sync iterator to the end
+    before sending anything (django >= 4.2, older versions stream
+    sync iterators only).
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+    # content negotiation accepts the type of the stream, errors are
+    # rendered as one ndjson line or as json.
+    renderer_classes = (NDJSONRenderer, FastJSONRenderer)
+    chunk_size = 500
+
+    def get_queryset(self):
+        return Recipe.objects.filter(owner=self.request.user).only(
+            "id", "name", "cook_minutes", "price", "link").order_by("id")
+
+    def get_chunks(self, queryset):
+        "lists of recipes with their relations loaded."
+        prefetches = (
+            Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+            Prefetch("ingredients",
+                     queryset=Ingredient.objects.only("id", "name")),
+        )
+        recipes = queryset.iterator(chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(recipes, self.chunk_size))
+            if not chunk:
+                return
+            prefetch_related_objects(chunk, *prefetches)
+            yield chunk
+
+    def stream(self, queryset):
+        renderer = NDJSONRenderer()
+        for chunk in self.get_chunks(queryset):
+            yield renderer.render(
+                list(RecipeExportSerializer(chunk, many=True).data))
+
+    async def astream(self, queryset):
+        "stream of the ASGI handler, the chunks are read in a thread."
+        blocks = self.stream(queryset)
+        next_block = sync_to_async(next)
+        while True:
+            block = await next_block(blocks, None)
+            if block is None:
+                return
+            yield block
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        if (isinstance(request._request, ASGIRequest)
+                and django.VERSION >= (4, 2)):
+            content = self.astream(queryset)
+        else:
+            content = self.stream(queryset)
+        response = StreamingHttpResponse(
+            content, content_type="application/x-ndjson")
+        response["Content-Disposition"] = \
+            'attachment; filename="cookbook.ndjson"'
+        return response
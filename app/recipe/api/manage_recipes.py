@@ -1,23 +1,93 @@
-from rest_framework import viewsets, authentication, permissions, status
+from functools import partial
+from django.db.models import Prefetch
+from rest_framework import (
+    viewsets,
+    permissions,
+    status,
+    serializers)
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from user.authentication import CachedTokenAuthentication
+from ..filters import RecipeFilterBackend, RecipeSearchBackend
+from ..images import schedule_image_processing
 from ..models import Recipe
+from ..pagination import OwnerCursorPagination
+from ._async import AsyncReadMixin
+from ._base import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    RowListMixin)
+from ._bulk import BulkMixin
+from ..uploads import RecipeImageUploadHandler
 from ..serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
     RecipeImageSerializer)
 
 
-class ManageRecipe(viewsets.ModelViewSet):
+def plan_queryset(queryset, serializer_class, defer_unused=False):
+    """
+    plan the queryset for the given serializer class.
+    many related fields are prefetched in one query per relation,
+    nested serializers only load the columns they render.
+    when defer_unused is set, columns the serializer never
+    reads are left out of the main query.
+    """
+    model = queryset.model
+    fields = serializer_class().fields
+    prefetches = []
+    columns = {model._meta.pk.attname}
+    for name, field in fields.items():
+        source = field.source
+        if source == "*" or "." in source:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            child_fields = [
+                child.source for child in field.child.fields.values()
+                if child.source != "*" and "." not in child.source]
+            related = model._meta.get_field(source).related_model
+            prefetches.append(Prefetch(
+                source,
+                queryset=related.objects.only(*child_fields)))
+        elif isinstance(field, serializers.ManyRelatedField):
+            # ordered like the rows of the list endpoints.
+            related = model._meta.get_field(source).related_model
+            prefetches.append(Prefetch(
+                source, queryset=related.objects.only("pk").order_by("pk")))
+        elif not field.write_only:
+            columns.add(source)
+
+    queryset = queryset.prefetch_related(*prefetches)
+    if defer_unused:
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+class ManageRecipe(ConditionalGetMixin, CachedResponseMixin,
+                   BulkMixin, RowListMixin, AsyncReadMixin,
+                   viewsets.ModelViewSet):
     "manage recipe objects. all methods supported."
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = OwnerCursorPagination
+    filter_backends = (RecipeFilterBackend, RecipeSearchBackend)
+    # actions that only read the planned queryset.
+    read_actions = ("list", "retrieve")
+    cached_actions = read_actions
+    conditional_actions = read_actions
 
     def get_queryset(self):
         "filter the queryset with authenticated user."
-        return self.queryset.filter(owner=self.request.user)
+        queryset = self.queryset.filter(owner=self.request.user)
+        return plan_queryset(
+            queryset, self.get_serializer_class(),
+            defer_unused=self.action in self.read_actions)
+
+    def retrieve(self, request, *args, **kwargs):
+        handler = partial(self.cached_response, super().retrieve)
+        return self.conditional_response(handler, request, *args, **kwargs)
 
     def perform_create(self, serializer):
         "assocaite a foreign key with user"
@@ -35,12 +105,24 @@ class ManageRecipe(viewsets.ModelViewSet):
 
     @action(methods=['POST'], detail=True, url_path="image-upload")
     def upload_image(self, request, *args, **kwargs):
-        "handle recipe image uploads."
+        """
+        handle recipe image uploads.
+        renditions are processed in the background,
+        the response carries the pending status.
+        """
+        # must be installed before the request body is parsed.
+        upload_handler = RecipeImageUploadHandler(request)
+        request.upload_handlers = [upload_handler]
         recipe = self.get_object()
+        data = request.data
+        if upload_handler.error:
+            return Response({"image": [upload_handler.error]},
+                            status.HTTP_400_BAD_REQUEST)
         serializer = self.get_serializer(
-            instance=recipe, data=request.data)
+            instance=recipe, data=data)
         if serializer.is_valid(raise_exception=True):
-            serializer.save()
-            return Response(serializer.data, status.HTTP_200_OK)
+            recipe = serializer.save(image_status=Recipe.IMAGE_PENDING)
+            schedule_image_processing(recipe)
+            return Response(serializer.data, status.HTTP_202_ACCEPTED)
         return Response(serializer.errors,
                         status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,88 @@
+"""
+typeahead over tag and ingredient names.
+
+the names of an owner are loaded once into a trie, so repeat
+keystrokes are answered from memory after one aggregate query
+checking the names did not change (see recipe.cache). owners with
+more names than RECIPE_AUTOCOMPLETE_MAX_NAMES are answered by
+prefix scans of the (owner, lower(name)) index instead.
+"""
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models.functions import Lower
+from .cache import get_data_state
+
+# owner and model pairs whose trie is kept in memory.
+MAX_TRIES = 256
+
+_tries = OrderedDict()
+_lock = threading.Lock()
+
+
+class NameTrie:
+    """
+    character trie of names. rows are inserted in name order,
+    so walking the children in insertion order yields sorted names.
+    """
+
+    def __init__(self, rows):
+        self.root = {}
+        for pk, name in rows:
+            node = self.root
+            for char in name.lower():
+                node = node.setdefault(char, {})
+            # the empty key can never be a character.
+            node.setdefault("", []).append((pk, name))
+
+    def complete(self, prefix, limit):
+        "first names starting with the lowercase prefix."
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        matches, stack = [], [node]
+        while stack and len(matches) < limit:
+            node = stack.pop()
+            matches.extend(node.get("", ()))
+            stack.extend(
+                child for char, child in reversed(node.items()) if char)
+        return matches[:limit]
+
+
+def get_trie(queryset, owner_id):
+    """
+    trie of the names in the owner's queryset, None when the owner
+    has too many names to keep in memory.
+    """
+    key = (owner_id, queryset.model._meta.label)
+    version = get_data_state(queryset)
+    with _lock:
+        entry = _tries.get(key)
+        if entry is not None and entry[0] == version:
+            _tries.move_to_end(key)
+            return entry[1]
+    max_names = getattr(settings, "RECIPE_AUTOCOMPLETE_MAX_NAMES", 5000)
+    rows = list(queryset.order_by(Lower("name"), "id").values_list(
+        "id", "name")[:max_names + 1])
+    trie = NameTrie(rows) if len(rows) <= max_names else None
+    with _lock:
+        _tries[key] = (version, trie)
+        _tries.move_to_end(key)
+        while len(_tries) > MAX_TRIES:
+            _tries.popitem(last=False)
+    return trie
+
+
+def complete(queryset, owner_id, prefix, limit):
+    "(id, name) pairs of the owner's names starting with the prefix."
+    prefix = prefix.lower()
+    trie = get_trie(queryset, owner_id)
+    if trie is not None:
+        return trie.complete(prefix, limit)
+    return list(
+        queryset.annotate(lower_name=Lower("name"))
+        .filter(lower_name__startswith=prefix)
+        .order_by("lower_name", "id")
+        .values_list("id", "name")[:limit])
@@ -0,0 +1,74 @@
+"""
+per user response cache of the recipe api.
+
+every user has a version token. cached responses are keyed by
+the token, so bumping it invalidates all of the user's entries
+at once without scanning keys. stale entries are evicted by the
+cache backend (see RECIPE_CACHE_ALIAS and CACHES settings).
+"""
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+
+
+def get_cache():
+    "cache backend used by the recipe api."
+    return caches[getattr(settings, "RECIPE_CACHE_ALIAS", "default")]
+
+
+def get_timeout():
+    "lifetime of cached responses in seconds."
+    return getattr(settings, "RECIPE_CACHE_TIMEOUT", 300)
+
+
+def version_key(user_id):
+    return f"recipe:version:{user_id}"
+
+
+def get_user_version(user_id):
+    """
+    returns the version token of the user.
+    a missing token (never set or evicted) is replaced with
+    a fresh one, so old entries can never be served again.
+    """
+    cache = get_cache()
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_user_version(user_id):
+    "invalidates every cached response of the user."
+    get_cache().set(version_key(user_id), uuid.uuid4().hex, None)
+
+
+def get_data_state(queryset):
+    """
+    (count, newest updated_at) of the queryset, read from the
+    database. unlike the version token it moves with writes of
+    every process, including imports and bulk updates.
+    """
+    state = queryset.order_by().aggregate(
+        count=Count("pk"), last_modified=Max("updated_at"))
+    return state["count"], state["last_modified"]
+
+
+def response_key(user_id, *parts):
+    "builds the cache key of a response from the request parts."
+    digest = hashlib.md5(
+        ":".join(str(part) for part in parts).encode()).hexdigest()
+    return f"recipe:response:{user_id}:{get_user_version(user_id)}:{digest}"
+
+
+def get_response_data(key):
+    return get_cache().get(key)
+
+
+def set_response_data(key, data):
+    get_cache().set(key, data, get_timeout())
@@ -0,0 +1,69 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """
+    many related field resolving all submitted primary keys
+    with a single query instead of one query per key.
+    every missing key is reported in one error.
+    """
+    default_error_messages = {
+        'does_not_exist': _(
+            'Invalid pks {pk_values} - objects do not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(pks)
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pk_values=', '.join(
+                f'"{pk}"' for pk in missing))
+        return [objects[pk] for pk in pks]
+
+
+class OwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    primary key related field limited to the objects
+    owned by the requesting user, or by the "owner" of the
+    serializer context. without either no object is accepted.
+    many=True returns a batched many related field.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        "filter the queryset with the owner."
+        queryset = super().get_queryset()
+        owner = self.context.get('owner')
+        if owner is None:
+            request = self.context.get('request')
+            if request is None:
+                return queryset.none()
+            owner = request.user
+        return queryset.filter(owner=owner)
@@ -0,0 +1,134 @@
+from decimal import Decimal, InvalidOperation
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import Exists, OuterRef
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from .models import Recipe
+from .search import search_recipes
+
+# upper bound of ids in a single relation filter.
+MAX_FILTER_IDS = 50
+
+
+def parse_ids(params, name):
+    "parse a comma separated id list query parameter."
+    value = params.get(name)
+    if not value:
+        return []
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in value.split(",")))
+    except ValueError:
+        raise serializers.ValidationError(
+            {name: [_('Expected a comma separated list of ids.')]})
+    if len(ids) > MAX_FILTER_IDS:
+        raise serializers.ValidationError(
+            {name: [_('Ensure there are no more than {count} ids.')
+                    .format(count=MAX_FILTER_IDS)]})
+    return ids
+
+
+def parse_number(params, name, parse):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return parse(value)
+    except (ValueError, InvalidOperation):
+        raise serializers.ValidationError(
+            {name: [_('A valid number is required.')]})
+
+
+def parse_decimal(value):
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError(value)
+    return number
+
+
+def relation_conditions(field_name, ids, match):
+    """
+    EXISTS conditions on the through table of a recipe relation.
+    each probe is answered by the (recipe_id, target_id) unique
+    index of the through table, without joining the related rows.
+    """
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    target = f"{field.m2m_reverse_field_name()}_id"
+    rows = through.objects.filter(
+        **{f"{field.m2m_field_name()}_id": OuterRef("pk")})
+    if match == "any":
+        return [Exists(rows.filter(**{f"{target}__in": ids}))]
+    return [Exists(rows.filter(**{target: pk})) for pk in ids]
+
+
+def filter_recipes(queryset, params):
+    """
+    filter recipes by the query parameters.
+
+    tags, ingredients      comma separated ids
+    match                  all (default) or any of the ids of a relation
+    max_cook_minutes       cook minutes upper bound
+    price_lte              price upper bound
+    """
+    match = params.get("match", "all")
+    if match not in ("all", "any"):
+        raise serializers.ValidationError(
+            {"match": [_('Expected "all" or "any".')]})
+
+    conditions = []
+    for field_name in ("tags", "ingredients"):
+        ids = parse_ids(params, field_name)
+        if ids:
+            conditions.extend(relation_conditions(field_name, ids, match))
+    if conditions:
+        queryset = queryset.filter(*conditions)
+
+    max_cook_minutes = parse_number(params, "max_cook_minutes", int)
+    if max_cook_minutes is not None:
+        queryset = queryset.filter(cook_minutes__lte=max_cook_minutes)
+    price_lte = parse_number(params, "price_lte", parse_decimal)
+    if price_lte is not None:
+        queryset = queryset.filter(price__lte=price_lte)
+    return queryset
+
+
+class RecipeFilterBackend(BaseFilterBackend):
+    "filters recipe lists with the filter_recipes query parameters."
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_recipes(queryset, request.query_params)
+
+
+class RecipeSearchBackend(BaseFilterBackend):
+    """
+    full text search of recipe lists with the search query parameter.
+    cursor pagination picks up get_ordering, results are ranked.
+    """
+    search_param = "search"
+
+    def get_search_text(self, request):
+        return request.query_params.get(self.search_param, "").strip()
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+        return search_recipes(queryset, text, request.user.pk)
+
+    async def afilter_queryset(self, request, queryset, view):
+        "the fallback index is built from queries, in a thread."
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+        if connections[queryset.db].vendor == "postgresql":
+            return search_recipes(queryset, text, request.user.pk)
+        return await sync_to_async(search_recipes)(
+            queryset, text, request.user.pk)
+
+    def get_ordering(self, request, queryset, view):
+        "best ranked first, ties by id. None keeps the default ordering."
+        if self.get_search_text(request):
+            return ("-search_rank", "id")
+        return None
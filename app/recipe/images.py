@@ -0,0 +1,214 @@
+"""
+recipe image renditions.
+
+uploads are stored untouched and marked pending. renditions are
+rendered outside of the request, by the in process worker pool or
+by `manage.py process_images` draining the pending recipes, so the
+image_status column doubles as a database backed queue.
+"""
+import io
+import logging
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .cache import bump_user_version
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    "thumbnail": {"size": (150, 150), "format": "JPEG"},
+    "medium": {"size": (800, 800), "format": "JPEG"},
+    "webp": {"size": (800, 800), "format": "WEBP"},
+}
+
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+_executor = None
+
+# jpeg start of frame markers, the ones carrying the image size.
+JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _sniff_jpeg(header):
+    "walk the jpeg segments up to the start of frame."
+    offset = 2
+    while offset + 4 <= len(header):
+        if header[offset] != 0xFF:
+            raise ValueError("Corrupted JPEG header.")
+        marker = header[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in (0x01,) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        length = struct.unpack(">H", header[offset + 2:offset + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > len(header):
+                return None
+            height, width = struct.unpack(
+                ">HH", header[offset + 5:offset + 9])
+            return "JPEG", width, height
+        offset += 2 + length
+    return None
+
+
+def _sniff_webp(header):
+    if len(header) < 30:
+        return None
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return "WEBP", width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = struct.unpack("<I", header[21:25])[0]
+        return "WEBP", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return "WEBP", width, height
+    raise ValueError("Unsupported WebP chunk.")
+
+
+def sniff_image(header):
+    """
+    reads the format and size of an image from its first bytes,
+    without decoding it. returns (format, width, height), or None
+    while the header is too short to tell.
+    raises ValueError for unsupported or corrupted data.
+    """
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(header) < 24:
+            return None
+        width, height = struct.unpack(">II", header[16:24])
+        return "PNG", width, height
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        if len(header) < 10:
+            return None
+        width, height = struct.unpack("<HH", header[6:10])
+        return "GIF", width, height
+    if header.startswith(b"\xff\xd8\xff"):
+        return _sniff_jpeg(header)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return _sniff_webp(header)
+    if len(header) < 12:
+        return None
+    raise ValueError("Unsupported image format.")
+
+
+def available_renditions():
+    "renditions the installed Pillow build can encode."
+    Image.init()
+    return {
+        kind: options for kind, options in RENDITIONS.items()
+        if options["format"] in Image.SAVE}
+
+
+def rendition_name(image_name, kind):
+    "storage name of a rendition, next to the original image."
+    stem = os.path.splitext(image_name)[0]
+    extension = EXTENSIONS[RENDITIONS[kind]["format"]]
+    return f"{stem}_{kind}.{extension}"
+
+
+def rendition_urls(recipe):
+    "urls of the renditions of a processed recipe image."
+    if not recipe.image or recipe.image_status != Recipe.IMAGE_READY:
+        return {}
+    return {
+        kind: default_storage.url(rendition_name(recipe.image.name, kind))
+        for kind in available_renditions()}
+
+
+def render(image, size, image_format):
+    "resize the image to fit in size and encode it."
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    rendition.save(buffer, format=image_format, quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def process_recipe_image(recipe_id):
+    """
+    render every rendition of a pending recipe image.
+    the recipe is claimed first, so concurrent workers
+    never process the same image twice.
+    """
+    claimed = Recipe.objects.filter(
+        pk=recipe_id, image_status=Recipe.IMAGE_PENDING).update(
+            image_status=Recipe.IMAGE_PROCESSING)
+    if not claimed:
+        return
+    recipe = Recipe.objects.only("id", "owner", "image").get(pk=recipe_id)
+    status = Recipe.IMAGE_READY
+    try:
+        # content addressed images may be shared with other recipes,
+        # their existing renditions are reused.
+        missing = {
+            kind: options
+            for kind, options in available_renditions().items()
+            if not default_storage.exists(
+                rendition_name(recipe.image.name, kind))}
+        if missing:
+            with recipe.image.open("rb") as source:
+                image = ImageOps.exif_transpose(Image.open(source))
+                image = image.convert("RGB")
+        for kind, options in missing.items():
+            content = render(image, options["size"], options["format"])
+            default_storage.save(
+                rendition_name(recipe.image.name, kind), ContentFile(content))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception("Processing image of recipe %s failed.", recipe_id)
+        status = Recipe.IMAGE_FAILED
+
+    # a newer upload resets the status to pending, keep it.
+    Recipe.objects.filter(
+        pk=recipe_id, image=recipe.image.name,
+        image_status=Recipe.IMAGE_PROCESSING).update(
+            image_status=status, updated_at=timezone.now())
+    bump_user_version(recipe.owner_id)
+
+
+def run_in_worker(recipe_id):
+    "worker pool entry point. workers own their database connections."
+    try:
+        process_recipe_image(recipe_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "RECIPE_IMAGE_WORKERS", 2),
+            thread_name_prefix="recipe-images")
+    return _executor
+
+
+def schedule_image_processing(recipe):
+    """
+    process the recipe image once the upload is committed.
+    RECIPE_IMAGE_PROCESSING selects where:
+    "thread" in the in process worker pool,
+    "sync" in the request,
+    "queue" later by the process_images command.
+    """
+    mode = getattr(settings, "RECIPE_IMAGE_PROCESSING", "thread")
+    if mode == "queue":
+        return
+    if mode == "sync":
+        transaction.on_commit(lambda: process_recipe_image(recipe.pk))
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_worker, recipe.pk))
@@ -0,0 +1,227 @@
+"""
+streaming recipe import.
+
+records are read one by one (ndjson or csv), cleaned with the model
+fields, grouped into batches and written with bulk queries. tag and
+ingredient names are resolved through an in memory map per owner,
+missing ones are created in bulk. on postgresql recipes and through
+rows are written with COPY.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.utils import timezone
+from .models import Tag, Ingredient, Recipe
+
+# column values of the imported recipes.
+RECIPE_FIELDS = ("name", "cook_minutes", "price", "link")
+
+# relation fields and the models their names resolve to.
+RELATIONS = (("tags", Tag), ("ingredients", Ingredient))
+
+# separator of the tag and ingredient names in csv cells.
+CSV_NAME_SEPARATOR = "|"
+
+
+class RecordError(ValueError):
+    "an invalid record, with its line number."
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def read_ndjson(file):
+    "(line number, record) pairs of a newline delimited json file."
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as exc:
+            raise RecordError(line_number, f"invalid json ({exc}).")
+
+
+def read_csv(file):
+    "(line number, record) pairs of a csv file with a header row."
+    reader = csv.DictReader(file)
+    for record in reader:
+        for name, model in RELATIONS:
+            cell = record.get(name) or ""
+            record[name] = [
+                value.strip() for value in cell.split(CSV_NAME_SEPARATOR)
+                if value.strip()]
+        yield reader.line_num, record
+
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+
+def clean_names(line_number, model, values):
+    "related names of a record. exported objects with a name work too."
+    if not isinstance(values, list):
+        raise RecordError(line_number, "expected a list of names.")
+    field = model._meta.get_field("name")
+    names = []
+    for value in values:
+        if isinstance(value, dict):
+            value = value.get("name")
+        try:
+            names.append(field.clean(value, None))
+        except ValidationError as exc:
+            raise RecordError(
+                line_number, f"{model._meta.verbose_name}: {exc.messages[0]}")
+    return list(dict.fromkeys(names))
+
+
+def clean_records(records):
+    "validate the records with the recipe model fields."
+    for line_number, record in records:
+        if not isinstance(record, dict):
+            raise RecordError(line_number, "expected an object.")
+        values = {}
+        for name in RECIPE_FIELDS:
+            field = Recipe._meta.get_field(name)
+            value = record.get(name)
+            if value is None and field.blank:
+                value = ""
+            try:
+                values[name] = field.clean(value, None)
+            except ValidationError as exc:
+                raise RecordError(line_number, f"{name}: {exc.messages[0]}")
+        for name, model in RELATIONS:
+            values[name] = clean_names(
+                line_number, model, record.get(name) or [])
+        yield values
+
+
+def batched(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class NameMap:
+    """
+    name to id map of the tags or ingredients of an owner.
+    loaded once, missing names are created in bulk.
+    """
+
+    def __init__(self, model, owner):
+        self.model = model
+        self.owner = owner
+        self.ids = {}
+        self.created = 0
+        names = model.objects.filter(owner=owner).order_by("id")
+        for name, pk in names.values_list("name", "id").iterator():
+            self.ids.setdefault(name, pk)
+
+    def resolve(self, names):
+        "name to id map of the names, creating the missing ones at once."
+        names = list(dict.fromkeys(names))
+        missing = [name for name in names if name not in self.ids]
+        if missing:
+            objects = self.model.objects.bulk_create(
+                self.model(owner=self.owner, name=name) for name in missing)
+            if any(obj.pk is None for obj in objects):
+                # backends that do not return the inserted ids.
+                objects = self.model.objects.filter(
+                    owner=self.owner, name__in=missing).order_by("id")
+            for obj in objects:
+                self.ids[obj.name] = obj.pk
+            self.created += len(missing)
+        return {name: self.ids[name] for name in names}
+
+
+class RecipeImporter:
+    "writes batches of cleaned records for one owner."
+
+    def __init__(self, owner, using="default", use_copy=None):
+        self.owner = owner
+        self.using = using
+        self.connection = connections[using]
+        if use_copy is None:
+            use_copy = self.connection.vendor == "postgresql"
+        self.use_copy = use_copy
+        self.names = {
+            name: NameMap(model, owner) for name, model in RELATIONS}
+        self.imported = 0
+
+    def import_batch(self, records):
+        now = timezone.now()
+        recipes = [
+            Recipe(owner=self.owner, updated_at=now, **{
+                name: record[name] for name in RECIPE_FIELDS})
+            for record in records]
+        if self.use_copy:
+            self.copy_recipes(recipes)
+        else:
+            recipes = Recipe.objects.using(self.using).bulk_create(recipes)
+        for name, model in RELATIONS:
+            field = Recipe._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            ids = self.names[name].resolve(
+                value for record in records for value in record[name])
+            rows = [
+                (recipe.pk, ids[value])
+                for recipe, record in zip(recipes, records)
+                for value in record[name]]
+            if self.use_copy:
+                self.copy(through._meta.db_table, (source, target), rows)
+            else:
+                through.objects.using(self.using).bulk_create(
+                    through(**{source: recipe_id, target: pk})
+                    for recipe_id, pk in rows)
+        self.imported += len(recipes)
+
+    def copy_recipes(self, recipes):
+        "COPY the recipes, with ids reserved from their sequence first."
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [Recipe._meta.db_table, len(recipes)])
+            for recipe, (pk,) in zip(recipes, cursor.fetchall()):
+                recipe.pk = pk
+        # the search vector is set by the insert trigger.
+        fields = [
+            field for field in Recipe._meta.concrete_fields
+            if field.name != "search_vector"]
+        self.copy(
+            Recipe._meta.db_table, [field.column for field in fields], (
+                [field.get_db_prep_save(
+                    getattr(recipe, field.attname), self.connection)
+                 for field in fields]
+                for recipe in recipes))
+
+    def copy(self, table, columns, rows):
+        "write the rows with COPY FROM STDIN in csv format."
+        buffer = io.StringIO()
+        # quoted empty strings are not read as NULL.
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+        quote = self.connection.ops.quote_name
+        sql = (f"COPY {quote(table)} "
+               f"({', '.join(quote(column) for column in columns)}) "
+               f"FROM STDIN WITH (FORMAT csv)")
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):
+                buffer.seek(0)
+                raw.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    @property
+    def created(self):
+        "tags and ingredients created, by relation name."
+        return {name: names.created for name, names in self.names.items()}
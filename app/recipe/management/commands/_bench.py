@@ -0,0 +1,123 @@
+"""
+helpers shared by the benchmark commands.
+"""
+import io
+import random
+import statistics
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from ...models import Tag, Ingredient, Recipe
+
+HOST = "localhost"
+
+
+def create_owner(email=None, password=None):
+    "a throwaway benchmark user."
+    return get_user_model().objects.create_user(
+        email=email or f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        password=password)
+
+
+def create_cookbook(owner, recipes, tags=50, ingredients=200,
+                    tags_per_recipe=3, ingredients_per_recipe=6,
+                    batch_size=2000, seed=0):
+    """
+    bulk create synthetic recipes for the owner. tags and
+    ingredients are created on the first call and reused after,
+    so a cookbook can be grown scale by scale.
+    """
+    rng = random.Random(seed + Recipe.objects.filter(owner=owner).count())
+    tag_ids = list(Tag.objects.filter(
+        owner=owner).values_list("id", flat=True))
+    if not tag_ids:
+        tag_ids = [tag.id for tag in Tag.objects.bulk_create(
+            Tag(owner=owner, name=f"tag {index}")
+            for index in range(tags))]
+    ingredient_ids = list(Ingredient.objects.filter(
+        owner=owner).values_list("id", flat=True))
+    if not ingredient_ids:
+        ingredient_ids = [
+            ingredient.id for ingredient in Ingredient.objects.bulk_create(
+                Ingredient(owner=owner, name=f"ingredient {index}")
+                for index in range(ingredients))]
+
+    tag_through = Recipe.tags.through
+    ingredient_through = Recipe.ingredients.through
+    for start in range(0, recipes, batch_size):
+        batch = Recipe.objects.bulk_create(
+            Recipe(owner=owner, name=f"recipe {start + index}",
+                   cook_minutes=rng.randint(5, 120),
+                   price=rng.randint(100, 9999) / 100)
+            for index in range(min(batch_size, recipes - start)))
+        tag_through.objects.bulk_create(
+            tag_through(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe in batch
+            for tag_id in rng.sample(tag_ids, tags_per_recipe))
+        ingredient_through.objects.bulk_create(
+            ingredient_through(recipe_id=recipe.id, ingredient_id=pk)
+            for recipe in batch
+            for pk in rng.sample(ingredient_ids, ingredients_per_recipe))
+    return tag_ids, ingredient_ids
+
+
+@contextmanager
+def rolled_back():
+    "run the benchmark in a transaction that is never committed."
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(function, repeat):
+    "wall clock seconds of each call."
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentiles(samples):
+    "p50, p95 and p99 of the samples in milliseconds."
+    if len(samples) == 1:
+        return {key: samples[0] * 1000 for key in ("p50", "p95", "p99")}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000,
+            "p99": cuts[98] * 1000}
+
+
+def wsgi_get(application, url, token):
+    "status of a GET request handled by the wsgi application."
+    path, _, query = url.partition("?")
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": HOST,
+        "HTTP_AUTHORIZATION": f"Token {token}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    body = application(
+        environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        b"".join(body)
+    finally:
+        body.close()
+    return int(status[0].split()[0])
@@ -0,0 +1,341 @@
+import io
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ...models import Recipe
+from ._bench import create_owner, create_cookbook, percentiles
+
+PASSWORD = "bench-Secret-4711"
+
+
+def recipe_payload(context, index):
+    return {"name": f"bench recipe {index}", "cook_minutes": 10,
+            "price": "4.50", "tags": context["tag_ids"][:2],
+            "ingredients": context["ingredient_ids"][:3]}
+
+
+def image_upload(context, index):
+    "a fresh small png per request, uploads consume their file."
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (index % 256, 80, 160)).save(buffer, "PNG")
+    buffer.seek(0)
+    buffer.name = "bench.png"
+    return {"image": buffer}
+
+
+def new_recipe(context, index):
+    "a recipe the request may change or delete."
+    return Recipe.objects.create(
+        owner=context["user"], name=f"bench target {index}",
+        cook_minutes=10, price=1).pk
+
+
+# name, method, path(context, index), body(context, index) or None,
+# request format. paths and bodies are built before the requests run.
+CASES = (
+    ("tag list", "get",
+     lambda c, i: reverse("recipe:tag-list"), None, None),
+    ("tag create", "post",
+     lambda c, i: reverse("recipe:tag-list"),
+     lambda c, i: {"name": f"bench tag {i}"}, "json"),
+    ("tag autocomplete", "get",
+     lambda c, i: reverse("recipe:tag-autocomplete") + "?prefix=tag%201",
+     None, None),
+    ("tag bulk", "post",
+     lambda c, i: reverse("recipe:tag-bulk"),
+     lambda c, i: [{"name": f"bench tag {i} {n}"} for n in range(10)],
+     "json"),
+    ("ingredient list", "get",
+     lambda c, i: reverse("recipe:ingredient-list"), None, None),
+    ("ingredient create", "post",
+     lambda c, i: reverse("recipe:ingredient-list"),
+     lambda c, i: {"name": f"bench ingredient {i}"}, "json"),
+    ("ingredient autocomplete", "get",
+     lambda c, i: reverse(
+         "recipe:ingredient-autocomplete") + "?prefix=ingredient%201",
+     None, None),
+    ("ingredient bulk", "post",
+     lambda c, i: reverse("recipe:ingredient-bulk"),
+     lambda c, i: [{"name": f"bench ingredient {i} {n}"}
+                   for n in range(10)], "json"),
+    ("recipe list", "get",
+     lambda c, i: reverse("recipe:recipe-list"), None, None),
+    ("recipe list filtered", "get",
+     lambda c, i: reverse("recipe:recipe-list") + "?tags={}&price_lte=50"
+     .format(c["tag_ids"][i % len(c["tag_ids"])]), None, None),
+    ("recipe search", "get",
+     lambda c, i: reverse("recipe:recipe-list") + f"?search=recipe+{i}",
+     None, None),
+    ("recipe create", "post",
+     lambda c, i: reverse("recipe:recipe-list"), recipe_payload, "json"),
+    ("recipe detail", "get",
+     lambda c, i: reverse("recipe:recipe-detail", kwargs={
+         "pk": c["recipe_ids"][i % len(c["recipe_ids"])]}), None, None),
+    ("recipe update", "patch",
+     lambda c, i: reverse("recipe:recipe-detail", kwargs={
+         "pk": c["recipe_ids"][i % len(c["recipe_ids"])]}),
+     lambda c, i: {"name": f"bench renamed {i}"}, "json"),
+    ("recipe delete", "delete",
+     lambda c, i: reverse("recipe:recipe-detail", kwargs={
+         "pk": new_recipe(c, i)}), None, None),
+    ("recipe bulk create", "post",
+     lambda c, i: reverse("recipe:recipe-bulk"),
+     lambda c, i: [recipe_payload(c, n) for n in range(10)], "json"),
+    ("recipe bulk update", "patch",
+     lambda c, i: reverse("recipe:recipe-bulk"),
+     lambda c, i: [{"id": pk, "price": "5.00"}
+                   for pk in c["recipe_ids"][:10]], "json"),
+    ("recipe bulk delete", "delete",
+     lambda c, i: reverse("recipe:recipe-bulk"),
+     lambda c, i: [new_recipe(c, i)], "json"),
+    ("recipe image upload", "post",
+     lambda c, i: reverse("recipe:recipe-upload-image", kwargs={
+         "pk": c["recipe_ids"][i % len(c["recipe_ids"])]}),
+     image_upload, "multipart"),
+    ("recipe export", "get",
+     lambda c, i: reverse("recipe:export"), None, None),
+    ("user create", "post",
+     lambda c, i: reverse("user:create"),
+     lambda c, i: {"email": f"{c['prefix']}new-{uuid.uuid4().hex}@x.io",
+                   "password": PASSWORD}, "json"),
+    ("user obtain token", "post",
+     lambda c, i: reverse("user:obtain-token"),
+     lambda c, i: {"email": c["user"].email, "password": PASSWORD}, "json"),
+    ("user me", "get", lambda c, i: reverse("user:me"), None, None),
+    ("user me update", "patch",
+     lambda c, i: reverse("user:me"),
+     lambda c, i: {"first_name": f"bench {i}"}, "json"),
+)
+
+
+class Command(BaseCommand):
+    """
+    in process load test of the recipe and user apis.
+
+    synthetic users with tags, ingredients and recipes are created
+    for every scale (recipes per user) and removed afterwards. every
+    endpoint is requested with token authentication: first one by
+    one to count queries and allocations, then from concurrent
+    threads to measure latency. results can be stored as a baseline,
+    later runs fail on query count, p95 latency or allocation
+    regressions against it.
+
+    the data is committed, the worker threads use their own database
+    connections. run it against a development database.
+    """
+    help = "Benchmark every recipe and user api endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", default="100,1000",
+            help="comma separated recipe counts per user.")
+        parser.add_argument("--users", type=int, default=2)
+        parser.add_argument(
+            "--requests", type=int, default=40,
+            help="timed requests per endpoint.")
+        parser.add_argument(
+            "--profile-requests", type=int, default=5,
+            help="requests per endpoint counting queries and allocations.")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--endpoints", default="",
+            help="only endpoints whose name contains this text.")
+        parser.add_argument("--baseline", help="json file to compare to.")
+        parser.add_argument(
+            "--save-baseline", help="json file to store the results in.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25,
+            help="allowed relative p95 latency and allocation growth.")
+
+    def handle(self, *args, **options):
+        cases = [case for case in CASES if options["endpoints"] in case[0]]
+        scales = [int(scale) for scale in options["scales"].split(",")]
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        media_root = tempfile.mkdtemp(prefix="bench-media-")
+        results = {}
+        try:
+            # the test client sends its requests to "testserver".
+            with override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                    MEDIA_ROOT=media_root, RECIPE_IMAGE_PROCESSING="queue"):
+                for scale in scales:
+                    contexts = self.create_users(
+                        prefix, scale, options["users"])
+                    results[str(scale)] = {
+                        case[0]: self.run_case(case, contexts, options)
+                        for case in cases}
+                    self.report(scale, results[str(scale)])
+        finally:
+            get_user_model().objects.filter(
+                email__startswith=prefix).delete()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}.")
+        if options["baseline"]:
+            self.check_baseline(results, options)
+
+    def create_users(self, prefix, scale, count):
+        "users with their cookbooks and tokens."
+        contexts = []
+        for index in range(count):
+            user = create_owner(
+                email=f"{prefix}{scale}-{index}@example.com",
+                password=PASSWORD)
+            tag_ids, ingredient_ids = create_cookbook(user, scale)
+            contexts.append({
+                "prefix": prefix,
+                "user": user,
+                "token": Token.objects.create(user=user).key,
+                "tag_ids": tag_ids,
+                "ingredient_ids": ingredient_ids,
+                "recipe_ids": list(Recipe.objects.filter(
+                    owner=user).order_by("id").values_list(
+                        "id", flat=True)[:100]),
+            })
+        return contexts
+
+    def build_requests(self, case, contexts, count, start):
+        "(token, method, path, body, format) of the requests to send."
+        name, method, path, body, request_format = case
+        requests = []
+        for index in range(start, start + count):
+            context = contexts[index % len(contexts)]
+            requests.append((
+                context["token"], method, path(context, index),
+                body(context, index) if body else None,
+                request_format))
+        return requests
+
+    def send(self, client, request):
+        token, method, path, body, request_format = request
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        kwargs = {}
+        if body is not None:
+            kwargs = {"data": body, "format": request_format}
+        response = getattr(client, method)(path, **kwargs)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        if response.status_code >= 400:
+            raise CommandError(
+                f"{method.upper()} {path} answered {response.status_code}.")
+        return response
+
+    def profile(self, requests):
+        "queries and peak allocated kilobytes of each request."
+        client = APIClient()
+        queries, allocations = [], []
+        tracemalloc.start()
+        try:
+            for request in requests:
+                tracemalloc.stop()
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as captured:
+                    self.send(client, request)
+                queries.append(len(captured))
+                allocations.append(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+        return queries, allocations
+
+    def measure(self, requests, concurrency):
+        "latency of each request, sent from concurrent threads."
+        samples, errors = [], []
+        lock = threading.Lock()
+
+        def work(share):
+            client = APIClient()
+            try:
+                for request in share:
+                    start = time.perf_counter()
+                    self.send(client, request)
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        samples.append(elapsed)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=(requests[index::concurrency],))
+            for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return samples
+
+    def run_case(self, case, contexts, options):
+        profiled = self.build_requests(
+            case, contexts, options["profile_requests"], 0)
+        queries, allocations = self.profile(profiled)
+        timed = self.build_requests(
+            case, contexts, options["requests"], len(profiled))
+        concurrency = options["concurrency"]
+        if case[1] != "get" and connection.vendor == "sqlite":
+            # sqlite locks the database for concurrent writers.
+            concurrency = 1
+        latency = percentiles(self.measure(timed, concurrency))
+        return {
+            "p50": round(latency["p50"], 3),
+            "p95": round(latency["p95"], 3),
+            "p99": round(latency["p99"], 3),
+            "queries": statistics.median(queries),
+            "alloc_kb": round(statistics.median(allocations), 1),
+        }
+
+    def report(self, scale, results):
+        self.stdout.write(
+            f"\n{scale} recipes per user\n"
+            f"{'endpoint':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'alloc KB':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<26} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+                f"{result['p99']:>8.2f} {result['queries']:>8g} "
+                f"{result['alloc_kb']:>9.1f}")
+
+    def check_baseline(self, results, options):
+        "fail on regressions against the stored baseline."
+        with open(options["baseline"]) as file:
+            baseline = json.load(file)
+        limit = 1 + options["tolerance"]
+        regressions = []
+        for scale, endpoints in results.items():
+            for name, result in endpoints.items():
+                expected = baseline.get(scale, {}).get(name)
+                if expected is None:
+                    continue
+                if result["queries"] > expected["queries"]:
+                    regressions.append(
+                        f"{scale} {name}: {result['queries']:g} queries, "
+                        f"baseline {expected['queries']:g}")
+                for key in ("p95", "alloc_kb"):
+                    if result[key] > expected[key] * limit:
+                        regressions.append(
+                            f"{scale} {name}: {key} {result[key]}, "
+                            f"baseline {expected[key]}")
+        if regressions:
+            raise CommandError(
+                "Regressions against the baseline:\n"
+                + "\n".join(regressions))
+        self.stdout.write("No regressions against the baseline.")
@@ -0,0 +1,211 @@
+import asyncio
+import time
+import types
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+from ...models import Recipe
+from ...urls import get_urlpatterns
+from ._bench import (
+    HOST, create_owner, create_cookbook, percentiles, wsgi_get)
+
+
+def root_urlconf(async_views):
+    "url configuration serving the recipe api only."
+    module = types.ModuleType(f"bench_urls_{async_views}")
+    module.urlpatterns = [path("api/recipe/", include(
+        (get_urlpatterns(async_views=async_views), "recipe")))]
+    return module
+
+
+async def asgi_get(application, url, token):
+    "status of a GET request handled by the asgi application."
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", HOST.encode()),
+            (b"authorization", f"Token {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # the client never disconnects.
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def http_get(base_url, url, token):
+    "status of a GET request sent to a running server."
+    request = Request(
+        base_url.rstrip("/") + url,
+        headers={"Authorization": f"Token {token}"})
+    try:
+        with urlopen(request) as response:
+            response.read()
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+class Command(BaseCommand):
+    """
+    compares the async list and retrieve views under the ASGI
+    handler with the sync views under the WSGI handler.
+
+    by default both handlers run in process: the WSGI handler on a
+    thread pool the size of the concurrency, like a threaded server,
+    the ASGI handler on one event loop with as many requests in
+    flight. with --url the requests are sent to a running server
+    instead, for example one started with
+
+        RECIPE_ASYNC_VIEWS=1 uvicorn recipe_backend.asgi:application
+
+    and, for the sync path, gunicorn --threads or runserver.
+
+    users with their cookbooks are created and committed (a server
+    must see them), and deleted afterwards. the response cache is
+    disabled unless --cached is given.
+    """
+    help = "Benchmark the async recipe views against the sync ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recipes", type=int, default=1000,
+            help="recipes per user.")
+        parser.add_argument("--users", type=int, default=4)
+        parser.add_argument(
+            "--requests", type=int, default=1000,
+            help="requests per handler and concurrency level.")
+        parser.add_argument(
+            "--concurrency", default="10,100",
+            help="comma separated requests in flight.")
+        parser.add_argument(
+            "--url", help="base url of a running server to benchmark.")
+        parser.add_argument(
+            "--cached", action="store_true",
+            help="keep the per user response cache enabled.")
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        overrides = {} if options["cached"] else {"RECIPE_CACHE_TIMEOUT": 0}
+        try:
+            requests = self.create_requests(prefix, options)
+            self.stdout.write(
+                f"{'handler':<8} {'in flight':>9} {'req/s':>9} "
+                f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            with override_settings(**overrides):
+                for level in levels:
+                    for name, run in self.get_handlers(options):
+                        self.report(name, level, run, requests)
+        finally:
+            get_user_model().objects.filter(
+                email__startswith=prefix).delete()
+
+    def create_requests(self, prefix, options):
+        "(url, token) pairs of list, filtered list and detail requests."
+        requests = []
+        for index in range(options["users"]):
+            user = create_owner(email=f"{prefix}{index}@example.com")
+            tag_ids, _ = create_cookbook(user, options["recipes"])
+            token = Token.objects.create(user=user).key
+            recipe_ids = Recipe.objects.filter(owner=user).values_list(
+                "id", flat=True)[:5]
+            requests.append(("/api/recipe/recipes/", token))
+            requests.append((f"/api/recipe/recipes/?tags={tag_ids[0]}", token))
+            requests.append(("/api/recipe/tags/", token))
+            requests.extend(
+                (f"/api/recipe/recipes/{pk}/", token)
+                for pk in recipe_ids)
+        count = options["requests"]
+        return [requests[index % len(requests)] for index in range(count)]
+
+    def get_handlers(self, options):
+        "(name, run(requests, concurrency)) of the benchmarked handlers."
+        if options["url"]:
+            return [("http", lambda requests, level: self.run_threads(
+                lambda url, token: http_get(options["url"], url, token),
+                requests, level))]
+        wsgi = get_wsgi_application()
+        asgi = get_asgi_application()
+        return [
+            ("wsgi", lambda requests, level: self.run_wsgi(
+                wsgi, requests, level)),
+            ("asgi", lambda requests, level: self.run_asgi(
+                asgi, requests, level)),
+        ]
+
+    def run_threads(self, get, requests, level):
+        def timed(request):
+            start = time.perf_counter()
+            status = get(*request)
+            return status, time.perf_counter() - start
+
+        with ThreadPoolExecutor(level) as pool:
+            return list(pool.map(timed, requests))
+
+    def run_wsgi(self, application, requests, level):
+        with override_settings(ROOT_URLCONF=root_urlconf(False)):
+            return self.run_threads(
+                lambda url, token: wsgi_get(application, url, token),
+                requests, level)
+
+    def run_asgi(self, application, requests, level):
+        async def run():
+            semaphore = asyncio.Semaphore(level)
+
+            async def timed(url, token):
+                async with semaphore:
+                    start = time.perf_counter()
+                    status = await asgi_get(application, url, token)
+                    return status, time.perf_counter() - start
+
+            return await asyncio.gather(
+                *(timed(url, token) for url, token in requests))
+
+        with override_settings(ROOT_URLCONF=root_urlconf(True)):
+            return asyncio.run(run())
+
+    def report(self, name, level, run, requests):
+        start = time.perf_counter()
+        results = run(requests, level)
+        elapsed = time.perf_counter() - start
+        failed = [status for status, seconds in results if status != 200]
+        if failed:
+            raise CommandError(
+                f"{name}: {len(failed)} requests failed, "
+                f"first status {failed[0]}.")
+        latency = percentiles([seconds for status, seconds in results])
+        self.stdout.write(
+            f"{name:<8} {level:>9} {len(results) / elapsed:>9.0f} "
+            f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+            f"{latency['p99']:>8.2f}")
@@ -0,0 +1,174 @@
+import importlib.util
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from ._bench import create_owner, create_cookbook, percentiles, wsgi_get
+
+URLS = ("/api/recipe/tags/", "/api/recipe/recipes/?page_size=10")
+
+
+def pool_supported():
+    "django's psycopg pool can be used in this environment."
+    return (connection.vendor == "postgresql"
+            and django.VERSION >= (5, 1)
+            and importlib.util.find_spec("psycopg") is not None
+            and importlib.util.find_spec("psycopg_pool") is not None)
+
+
+class Command(BaseCommand):
+    """
+    compares the request latency of the database connection modes
+    of DATABASES["default"]:
+
+        connect     CONN_MAX_AGE = 0, a new connection per request
+        persistent  CONN_MAX_AGE with health checks, one connection
+                    per thread reused across requests
+        pool        the psycopg pool of django 5.1 (DB_POOL=1),
+                    when psycopg[pool] is installed
+
+    requests go through the in process WSGI handler, so connections
+    are opened and closed by the request signals as in a server.
+    every thread sends one untimed request first. "opened" counts
+    the connections opened while timing (for the pool, the pool
+    size at the end). meant for a local PostgreSQL: on SQLite a
+    connection costs next to nothing.
+    """
+    help = "Benchmark request latency with and without pooled connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--threads", default="1,8",
+            help="comma separated worker threads.")
+        parser.add_argument(
+            "--recipes", type=int, default=50,
+            help="recipes of the benchmark user.")
+        parser.add_argument(
+            "--modes", default="connect,persistent,pool",
+            help="comma separated connection modes.")
+
+    def handle(self, *args, **options):
+        modes = options["modes"].split(",")
+        if "pool" in modes and not pool_supported():
+            self.stderr.write(
+                "Skipping pool: it needs PostgreSQL, Django 5.1 or later "
+                "and psycopg[pool].")
+            modes.remove("pool")
+        unknown = set(modes) - {"connect", "persistent", "pool"}
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}.")
+        if connection.vendor != "postgresql":
+            self.stderr.write(
+                f"Connections to {connection.vendor} are cheap, the "
+                "results do not carry over to PostgreSQL.")
+        levels = [int(level) for level in options["threads"].split(",")]
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        application = get_wsgi_application()
+        try:
+            user = create_owner(email=f"{prefix}0@example.com")
+            create_cookbook(user, options["recipes"])
+            token = Token.objects.create(user=user).key
+            self.stdout.write(
+                f"{'mode':<11} {'threads':>7} {'req/s':>9} {'p50 ms':>8} "
+                f"{'p95 ms':>8} {'p99 ms':>8} {'opened':>7}")
+            with override_settings(RECIPE_CACHE_TIMEOUT=0):
+                for level in levels:
+                    for mode in modes:
+                        with self.connection_mode(mode):
+                            self.report(mode, level, application, token,
+                                        options["requests"])
+        finally:
+            get_user_model().objects.filter(
+                email__startswith=prefix).delete()
+
+    @contextmanager
+    def connection_mode(self, mode):
+        "configure the default database for the mode."
+        settings_dict = connection.settings_dict
+        saved = {key: settings_dict.get(key)
+                 for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")}
+        options = dict(saved["OPTIONS"])
+        pool = options.pop("pool", None)
+        settings_dict["CONN_MAX_AGE"] = 0
+        if mode == "persistent":
+            settings_dict["CONN_MAX_AGE"] = saved["CONN_MAX_AGE"] or 600
+            settings_dict["CONN_HEALTH_CHECKS"] = True
+        elif mode == "pool":
+            options["pool"] = pool or True
+        settings_dict["OPTIONS"] = options
+        connections.close_all()
+        try:
+            yield
+        finally:
+            connections.close_all()
+            if mode == "pool":
+                connection.close_pool()
+            settings_dict.update(saved)
+
+    def report(self, mode, level, application, token, count):
+        opened = []
+        samples = []
+        lock = threading.Lock()
+
+        def count_connection(sender, **kwargs):
+            opened.append(sender)
+
+        # counting starts once every thread has its warm up request
+        # done, before any is released.
+        ready = threading.Barrier(
+            level + 1,
+            action=lambda: connection_created.connect(count_connection))
+
+        def work(urls):
+            try:
+                wsgi_get(application, URLS[0], token)
+                ready.wait()
+                times = []
+                for url in urls:
+                    start = time.perf_counter()
+                    status = wsgi_get(application, url, token)
+                    times.append(time.perf_counter() - start)
+                    if status != 200:
+                        raise CommandError(f"{url} answered {status}.")
+                with lock:
+                    samples.extend(times)
+            except BaseException:
+                ready.abort()
+                raise
+            finally:
+                connections.close_all()
+
+        requests = [URLS[index % len(URLS)] for index in range(count)]
+        threads = [
+            threading.Thread(target=work, args=(requests[index::level],))
+            for index in range(level)]
+        for thread in threads:
+            thread.start()
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            pass
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        connection_created.disconnect(count_connection)
+        if len(samples) != count:
+            raise CommandError(
+                f"{mode}: {count - len(samples)} requests failed.")
+        if mode == "pool":
+            opened = range(connection.pool.get_stats()["pool_size"])
+        latency = percentiles(samples)
+        self.stdout.write(
+            f"{mode:<11} {level:>7} {count / elapsed:>9.0f} "
+            f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+            f"{latency['p99']:>8.2f} {len(opened):>7}")
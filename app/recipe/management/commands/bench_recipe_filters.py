@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ...filters import filter_recipes
+from ...models import Recipe
+from ._bench import (
+    create_owner,
+    create_cookbook,
+    measure,
+    percentiles,
+    rolled_back)
+
+
+class Command(BaseCommand):
+    """
+    measures the first page of filtered recipe lists while the
+    cookbook grows. the data is created in a transaction that is
+    rolled back at the end.
+    """
+    help = "Benchmark recipe list filters at growing cookbook sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", default="1000,10000,100000",
+            help="comma separated recipe counts.")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def get_cases(self, tag_ids, ingredient_ids):
+        "filter query parameters to measure, by label."
+        tags = ",".join(str(pk) for pk in tag_ids[:2])
+        return {
+            "no filter": {},
+            "tags all": {"tags": tags},
+            "tags any": {"tags": tags, "match": "any"},
+            "tags and ingredients": {
+                "tags": str(tag_ids[0]),
+                "ingredients": str(ingredient_ids[0])},
+            "cook minutes and price": {
+                "max_cook_minutes": "30", "price_lte": "10"},
+        }
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options["scales"].split(",")]
+        limit = getattr(settings, "RECIPE_API_PAGE_SIZE", 50) + 1
+        self.stdout.write(
+            f"{'recipes':>8} {'case':<24} {'p50 ms':>8} {'p95 ms':>8}")
+        with rolled_back():
+            owner = create_owner()
+            created = 0
+            for scale in sorted(scales):
+                tag_ids, ingredient_ids = create_cookbook(
+                    owner, scale - created)
+                created = scale
+                owned = Recipe.objects.filter(owner=owner)
+                for label, params in self.get_cases(
+                        tag_ids, ingredient_ids).items():
+                    queryset = filter_recipes(
+                        owned, params).order_by("id")[:limit]
+                    stats = percentiles(measure(
+                        lambda: list(queryset.all()), options["repeat"]))
+                    self.stdout.write(
+                        f"{scale:>8} {label:<24} "
+                        f"{stats['p50']:>8.2f} {stats['p95']:>8.2f}")
@@ -0,0 +1,72 @@
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core import parsers, renderers
+from ...models import Recipe
+from ...rows import attach_relations, select_rows
+from ...serializers import RecipeSerializer
+from ._bench import (
+    create_owner,
+    create_cookbook,
+    measure,
+    percentiles,
+    rolled_back)
+
+
+class Command(BaseCommand):
+    """
+    compares rendering and parsing recipe lists with rest framework's
+    json renderer and parser and with the fast ones. the data is
+    created in a transaction that is rolled back at the end.
+    """
+    help = "Benchmark json rendering and parsing of recipe lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", default="1000,10000",
+            help="comma separated recipe counts.")
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        encoder = (
+            "orjson" if renderers.orjson is not None else
+            "ujson" if renderers.ujson is not None else "json")
+        self.stdout.write(f"fast encoder: {encoder}")
+        self.stdout.write(
+            f"{'recipes':>8} {'step':<8} {'drf MB/s':>9} "
+            f"{'fast MB/s':>10} {'speedup':>8}")
+        scales = [int(scale) for scale in options["scales"].split(",")]
+        with rolled_back():
+            owner = create_owner()
+            created = 0
+            for scale in sorted(scales):
+                create_cookbook(owner, scale - created)
+                created = scale
+                queryset = Recipe.objects.filter(owner=owner).order_by("id")
+                rows = attach_relations(
+                    list(select_rows(queryset, RecipeSerializer)), Recipe,
+                    RecipeSerializer, queryset.db)
+                data = {"next": None, "previous": None,
+                        "results": RecipeSerializer(rows, many=True).data}
+                self.compare(scale, data, options["repeat"])
+
+    def compare(self, scale, data, repeat):
+        body = JSONRenderer().render(data)
+        if renderers.FastJSONRenderer().render(data) != body:
+            raise CommandError("Renderers produce different bytes.")
+        megabytes = len(body) / 1e6
+        steps = (
+            ("render",
+             lambda: JSONRenderer().render(data),
+             lambda: renderers.FastJSONRenderer().render(data)),
+            ("parse",
+             lambda: JSONParser().parse(BytesIO(body)),
+             lambda: parsers.FastJSONParser().parse(BytesIO(body))),
+        )
+        for step, standard, fast in steps:
+            standard = percentiles(measure(standard, repeat))["p50"]
+            fast = percentiles(measure(fast, repeat))["p50"]
+            self.stdout.write(
+                f"{scale:>8} {step:<8} {megabytes / standard * 1000:>9.1f} "
+                f"{megabytes / fast * 1000:>10.1f} {standard / fast:>7.1f}x")
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from ...api.manage_recipes import plan_queryset
+from ...models import Tag, Ingredient, Recipe
+from ...rows import attach_relations, select_rows
+from ...serializers import (
+    TagSerializer,
+    IngredientSerializer,
+    RecipeSerializer)
+from ._bench import (
+    create_owner,
+    create_cookbook,
+    measure,
+    percentiles,
+    rolled_back)
+
+
+def serialize_instances(queryset, serializer_class):
+    queryset = plan_queryset(queryset, serializer_class, defer_unused=True)
+    return serializer_class(queryset, many=True).data
+
+
+def serialize_rows(queryset, serializer_class):
+    rows = attach_relations(
+        list(select_rows(queryset, serializer_class)), queryset.model,
+        serializer_class, queryset.db)
+    return serializer_class(rows, many=True).data
+
+
+class Command(BaseCommand):
+    """
+    compares serializing lists from model instances and from plain
+    rows, queries included. the data is created in a transaction
+    that is rolled back at the end.
+    """
+    help = "Benchmark instance and row serialization of list endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", default="1000,10000",
+            help="comma separated recipe counts.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options["scales"].split(",")]
+        self.stdout.write(
+            f"{'rows':>8} {'serializer':<22} {'instances ms':>13} "
+            f"{'rows ms':>9} {'speedup':>8}")
+        with rolled_back():
+            owner = create_owner()
+            created = 0
+            for scale in sorted(scales):
+                create_cookbook(owner, scale - created)
+                created = scale
+                for model, serializer_class in (
+                        (Recipe, RecipeSerializer),
+                        (Tag, TagSerializer),
+                        (Ingredient, IngredientSerializer)):
+                    self.compare(
+                        model.objects.filter(owner=owner).order_by("id"),
+                        serializer_class, options["repeat"])
+
+    def compare(self, queryset, serializer_class, repeat):
+        render = JSONRenderer().render
+        if render(serialize_instances(queryset, serializer_class)) != \
+                render(serialize_rows(queryset, serializer_class)):
+            raise CommandError(
+                f"{serializer_class.__name__} paths render differently.")
+        instances = percentiles(measure(
+            lambda: serialize_instances(queryset, serializer_class),
+            repeat))["p50"]
+        rows = percentiles(measure(
+            lambda: serialize_rows(queryset, serializer_class),
+            repeat))["p50"]
+        self.stdout.write(
+            f"{queryset.count():>8} {serializer_class.__name__:<22} "
+            f"{instances:>13.2f} {rows:>9.2f} {instances / rows:>7.1f}x")
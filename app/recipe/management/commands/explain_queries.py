@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from ...models import Tag, Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    """
+    prints the database plans of the hot list queries.
+    run it after schema changes to make sure the owner
+    scoped indexes are still used.
+    """
+    help = "Print EXPLAIN plans for the recipe api list queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner", help="email of the user the queries are scoped to.")
+        parser.add_argument(
+            "--analyze", action="store_true",
+            help="run the queries (EXPLAIN ANALYZE). postgresql only.")
+
+    def get_owner_id(self, email):
+        "resolve the owner id. falls back to the first user."
+        users = get_user_model().objects.order_by("id")
+        if email:
+            users = users.filter(email=email)
+        owner_id = users.values_list("id", flat=True).first()
+        if owner_id is None and email:
+            raise CommandError(f"No user with email {email}.")
+        return owner_id or 0
+
+    def get_queries(self, owner_id):
+        "the queries list endpoints run, with their labels."
+        # cursor pagination fetches one extra row to detect the next page.
+        limit = getattr(settings, "RECIPE_API_PAGE_SIZE", 50) + 1
+        queries = []
+        for model in (Tag, Ingredient, Recipe):
+            label = model._meta.verbose_name
+            owned = model.objects.filter(owner_id=owner_id)
+            queries.append(
+                (f"{label} list page", owned.order_by("id")[:limit]))
+            queries.append(
+                (f"{label} name lookup", owned.filter(name="sample")))
+        recipe_ids = Recipe.objects.filter(
+            owner_id=owner_id).order_by("id").values("id")[:limit]
+        for field in ("tags", "ingredients"):
+            related = Recipe._meta.get_field(field).related_model
+            queries.append((
+                f"recipe {field} prefetch",
+                related.objects.filter(recipe__in=recipe_ids)))
+        return queries
+
+    def handle(self, *args, **options):
+        owner_id = self.get_owner_id(options["owner"])
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        for label, queryset in self.get_queries(owner_id):
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
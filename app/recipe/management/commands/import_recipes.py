@@ -0,0 +1,90 @@
+import sys
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from ...cache import bump_user_version
+from ...importers import (
+    READERS,
+    RecordError,
+    RecipeImporter,
+    batched,
+    clean_records)
+
+
+class Command(BaseCommand):
+    """
+    imports recipes from a ndjson or csv file for one user.
+    the file is streamed, memory use depends on the batch size only.
+    the import runs in one transaction, an invalid record rolls
+    back everything and reports its line.
+
+    ndjson lines are objects like the /api/recipe/export/ lines,
+    tags and ingredients are lists of names (or objects with a name).
+    csv files have a header row with name, cook_minutes, price, link,
+    tags and ingredients columns, names are separated by "|".
+    """
+    help = "Import recipes from a NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='file to import, "-" for stdin.')
+        parser.add_argument(
+            "--owner", required=True,
+            help="email of the user the recipes are imported for.")
+        parser.add_argument(
+            "--format", choices=sorted(READERS),
+            help="file format. guessed from the extension by default.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--no-copy", action="store_true",
+            help="insert with bulk INSERTs instead of COPY on postgresql.")
+
+    def get_owner(self, email):
+        try:
+            return get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {email}.")
+
+    def open(self, path):
+        if path == "-":
+            return sys.stdin
+        try:
+            return open(path, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"Can not open {path}: {exc}.")
+
+    def handle(self, *args, **options):
+        owner = self.get_owner(options["owner"])
+        file_format = options["format"] or (
+            "csv" if options["path"].lower().endswith(".csv") else "ndjson")
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size must be positive.")
+
+        started = time.perf_counter()
+        file = self.open(options["path"])
+        try:
+            with transaction.atomic():
+                importer = RecipeImporter(
+                    owner, use_copy=False if options["no_copy"] else None)
+                records = clean_records(READERS[file_format](file))
+                for batch in batched(records, options["batch_size"]):
+                    importer.import_batch(batch)
+                    if options["verbosity"] > 1:
+                        self.stdout.write(
+                            f"Imported {importer.imported} recipes.")
+        except RecordError as exc:
+            raise CommandError(f"Nothing imported, {exc}")
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        # bulk writes do not send the model signals.
+        bump_user_version(owner.pk)
+
+        elapsed = time.perf_counter() - started
+        created = importer.created
+        self.stdout.write(
+            f"Imported {importer.imported} recipes "
+            f"({created['tags']} new tags, "
+            f"{created['ingredients']} new ingredients) "
+            f"in {elapsed:.2f}s, "
+            f"{importer.imported / max(elapsed, 1e-9):.0f} rows/s.")
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from ...images import process_recipe_image
+from ...models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    drains the pending recipe images.
+    used with RECIPE_IMAGE_PROCESSING = "queue", or to pick up
+    images left pending by a restarted worker pool.
+    """
+    help = "Render the renditions of pending recipe images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="keep polling for pending images.")
+        parser.add_argument(
+            "--interval", type=float, default=5,
+            help="seconds between polls with --loop.")
+
+    def process_pending(self):
+        "process every pending image. returns the processed count."
+        pending = Recipe.objects.filter(
+            image_status=Recipe.IMAGE_PENDING).order_by("id")
+        count = 0
+        for recipe_id in pending.values_list("id", flat=True).iterator():
+            process_recipe_image(recipe_id)
+            count += 1
+        return count
+
+    def handle(self, *args, **options):
+        while True:
+            count = self.process_pending()
+            if count:
+                self.stdout.write(f"Processed {count} images.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
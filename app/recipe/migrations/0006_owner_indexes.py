@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_recipe_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['owner', 'name'], name='recipe_ingr_owner_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['owner', 'id'], name='recipe_ingr_owner_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['owner', 'name'], name='recipe_rec_owner_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['owner', 'id'], name='recipe_rec_owner_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['owner', 'name'], name='recipe_tag_owner_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['owner', 'id'], name='recipe_tag_owner_id_idx'),
+        ),
+    ]
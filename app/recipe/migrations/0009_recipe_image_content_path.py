@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+import recipe.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0008_recipe_image_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, upload_to=recipe.models.generate_content_addressed_image_path),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    covering (target, recipe) indexes on the recipe relation through
+    tables. the (recipe, target) direction is covered by the unique
+    constraint django creates for auto created through tables.
+    """
+
+    dependencies = [
+        ('recipe', '0009_recipe_image_content_path'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX recipe_recipe_tags_tag_recipe_idx '
+            'ON recipe_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX recipe_recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX recipe_recipe_ingr_ingr_recipe_idx '
+            'ON recipe_recipe_ingredients (ingredient_id, recipe_id);',
+            'DROP INDEX recipe_recipe_ingr_ingr_recipe_idx;',
+        ),
+    ]
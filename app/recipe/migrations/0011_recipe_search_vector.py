@@ -0,0 +1,131 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:41
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_FUNCTION = """
+CREATE FUNCTION recipe_search_vector(integer, text) RETURNS tsvector
+LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('english', coalesce($2, '')), 'A')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(tag.name, ' ')
+            FROM recipe_tag tag
+            JOIN recipe_recipe_tags rel ON rel.tag_id = tag.id
+            WHERE rel.recipe_id = $1), '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipe_ingredient ingredient
+            JOIN recipe_recipe_ingredients rel
+                ON rel.ingredient_id = ingredient.id
+            WHERE rel.recipe_id = $1), '')), 'C')
+$$;
+"""
+
+RECIPE_TRIGGER = """
+CREATE FUNCTION recipe_recipe_search_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := recipe_search_vector(NEW.id, NEW.name);
+    RETURN NEW;
+END
+$$;
+CREATE TRIGGER recipe_recipe_search
+BEFORE INSERT OR UPDATE OF name ON recipe_recipe
+FOR EACH ROW EXECUTE PROCEDURE recipe_recipe_search_trigger();
+"""
+
+# statement level, bulk inserts of through rows update each recipe once.
+RELATION_TRIGGER_FUNCTION = """
+CREATE FUNCTION recipe_relation_search_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipe_recipe SET search_vector = recipe_search_vector(id, name)
+    WHERE id IN (SELECT recipe_id FROM changed_rows);
+    RETURN NULL;
+END
+$$;
+"""
+
+RELATION_TRIGGERS = """
+CREATE TRIGGER {through}_search_insert
+AFTER INSERT ON {through} REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE PROCEDURE recipe_relation_search_trigger();
+CREATE TRIGGER {through}_search_delete
+AFTER DELETE ON {through} REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE PROCEDURE recipe_relation_search_trigger();
+"""
+
+RENAME_TRIGGER = """
+CREATE FUNCTION {table}_search_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipe_recipe SET search_vector = recipe_search_vector(id, name)
+    WHERE id IN (
+        SELECT rel.recipe_id FROM {through} rel
+        JOIN new_rows ON new_rows.id = rel.{column}
+        JOIN old_rows ON old_rows.id = new_rows.id
+        WHERE new_rows.name IS DISTINCT FROM old_rows.name);
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER {table}_search
+AFTER UPDATE ON {table}
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE PROCEDURE {table}_search_trigger();
+"""
+
+RELATIONS = (
+    ("recipe_tag", "recipe_recipe_tags", "tag_id"),
+    ("recipe_ingredient", "recipe_recipe_ingredients", "ingredient_id"),
+)
+
+
+def create_search_triggers(apps, schema_editor):
+    "search vectors are only maintained on postgresql."
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    statements = [
+        SEARCH_VECTOR_FUNCTION, RECIPE_TRIGGER, RELATION_TRIGGER_FUNCTION]
+    for table, through, column in RELATIONS:
+        statements.append(RELATION_TRIGGERS.format(through=through))
+        statements.append(RENAME_TRIGGER.format(
+            table=table, through=through, column=column))
+    statements.append(
+        "UPDATE recipe_recipe "
+        "SET search_vector = recipe_search_vector(id, name);")
+    statements.append(
+        "CREATE INDEX recipe_rec_search_idx "
+        "ON recipe_recipe USING gin (search_vector);")
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    statements = [
+        "DROP INDEX recipe_rec_search_idx;",
+        "DROP FUNCTION recipe_recipe_search_trigger() CASCADE;",
+        "DROP FUNCTION recipe_relation_search_trigger() CASCADE;",
+    ]
+    for table, through, column in RELATIONS:
+        statements.append(f"DROP FUNCTION {table}_search_trigger() CASCADE;")
+    statements.append("DROP FUNCTION recipe_search_vector(integer, text);")
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0010_relation_reverse_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:05
+
+from django.db import migrations
+
+TABLES = (
+    ("recipe_tag", "recipe_tag_owner_lower_name_idx"),
+    ("recipe_ingredient", "recipe_ingr_owner_lower_name_idx"),
+)
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """
+    (owner, lower(name)) indexes for autocomplete prefix scans.
+    text_pattern_ops lets postgresql use them for LIKE 'prefix%'
+    under any collation.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, name in TABLES:
+        schema_editor.execute(
+            f"CREATE INDEX {name} ON {table} "
+            f"(owner_id, lower(name) text_pattern_ops);", params=None)
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, name in TABLES:
+        schema_editor.execute(f"DROP INDEX {name};", params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
+import hashlib
 import os
 import uuid
 # Create your models here.
@@ -12,6 +14,32 @@ def generate_recipe_image_path(instance, filename):
     return os.path.join('uploads/recipe/', generated_name)
 
 
+def image_content_digest(file):
+    """
+    sha256 of the file content. uploads streamed by the recipe
+    image upload handler carry it already.
+    """
+    digest = getattr(file, 'content_sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+        file.content_sha256 = digest
+    return digest
+
+
+def generate_content_addressed_image_path(instance, filename):
+    """
+    generates upload path from the content of the image,
+    identical uploads share the same path.
+    """
+    file_extension = filename.split('.')[-1].lower()
+    digest = image_content_digest(instance.image.file)
+    return os.path.join(
+        'uploads/recipe/', digest[:2], f"{digest}.{file_extension}")
+
+
 class Tag(models.Model):
     """Tag model."""
 
@@ -20,6 +48,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
         related_name='owned_tags')
     name = models.CharField(max_length=30)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "name"],
+                         name="recipe_tag_owner_name_idx"),
+            models.Index(fields=["owner", "id"],
+                         name="recipe_tag_owner_id_idx"),
+        ]
 
     def __str__(self):
         "String representation of tag instance."
@@ -32,6 +69,15 @@ class Ingredient(models.Model):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "name"],
+                         name="recipe_ingr_owner_name_idx"),
+            models.Index(fields=["owner", "id"],
+                         name="recipe_ingr_owner_id_idx"),
+        ]
 
     def __str__(self):
         "String representation of ingredient instance"
@@ -40,6 +86,17 @@ class Ingredient(models.Model):
 
 class Recipe(models.Model):
     "recipe objects."
+    IMAGE_PENDING = "pending"
+    IMAGE_PROCESSING = "processing"
+    IMAGE_READY = "ready"
+    IMAGE_FAILED = "failed"
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, "Pending"),
+        (IMAGE_PROCESSING, "Processing"),
+        (IMAGE_READY, "Ready"),
+        (IMAGE_FAILED, "Failed"),
+    )
+
     name = models.CharField(max_length=255)
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -50,7 +107,21 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('recipe.Ingredient')
     link = models.URLField(blank=True)
     image = models.ImageField(blank=True,
-                              upload_to=generate_recipe_image_path)
+                              upload_to=generate_content_addressed_image_path)
+    image_status = models.CharField(max_length=10, blank=True,
+                                    choices=IMAGE_STATUS_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True)
+    # name, tag and ingredient names, maintained by database
+    # triggers on postgresql. see recipe.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "name"],
+                         name="recipe_rec_owner_name_idx"),
+            models.Index(fields=["owner", "id"],
+                         name="recipe_rec_owner_id_idx"),
+        ]
 
     def __str__(self):
         "string representation of recipe objects."
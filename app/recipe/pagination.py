@@ -0,0 +1,68 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from core.aio import fetch
+
+
+class PageRead(Exception):
+    "raised by PageQuery when the page is read, with its queryset."
+
+    def __init__(self, queryset):
+        super().__init__()
+        self.queryset = queryset
+
+
+class PageQuery:
+    """
+    stands in for the queryset while the cursor pagination builds
+    the page query. reading it raises PageRead with the queryset,
+    or yields the rows read in the meantime.
+    """
+
+    def __init__(self, queryset, rows=None):
+        self.queryset = queryset
+        self.rows = rows
+
+    def order_by(self, *fields):
+        return PageQuery(self.queryset.order_by(*fields), self.rows)
+
+    def filter(self, *args, **kwargs):
+        return PageQuery(self.queryset.filter(*args, **kwargs), self.rows)
+
+    def __getitem__(self, key):
+        return PageQuery(self.queryset[key], self.rows)
+
+    def __iter__(self):
+        if self.rows is None:
+            raise PageRead(self.queryset)
+        return iter(self.rows)
+
+
+class OwnerCursorPagination(CursorPagination):
+    """
+    keyset pagination for owner scoped list endpoints.
+    querysets are already filtered by owner, so ordering on id
+    walks the (owner, id) index and every page costs the same
+    no matter how deep the cursor is.
+    """
+    ordering = ("id",)
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        "page size and its ceiling are configurable from settings."
+        self.page_size = getattr(settings, "RECIPE_API_PAGE_SIZE", 50)
+        self.max_page_size = getattr(
+            settings, "RECIPE_API_MAX_PAGE_SIZE", 100)
+        return super().get_page_size(request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset with the page read by the async orm.
+        a first run builds the page query, the second one pages
+        the rows read for it.
+        """
+        try:
+            return self.paginate_queryset(PageQuery(queryset), request, view)
+        except PageRead as read:
+            rows = await fetch(read.queryset)
+        return self.paginate_queryset(
+            PageQuery(queryset, rows), request, view)
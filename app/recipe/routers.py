@@ -0,0 +1,25 @@
+from django.urls import URLPattern
+from rest_framework import routers
+
+
+class AsyncReadRouter(routers.DefaultRouter):
+    """
+    router serving the routes of AsyncReadMixin viewsets with
+    their async view. list and retrieve run as coroutines, the
+    other actions of the route in a thread.
+    """
+
+    def get_urls(self):
+        urls = []
+        for url in super().get_urls():
+            callback = getattr(url, "callback", None)
+            cls = getattr(callback, "cls", None)
+            actions = getattr(callback, "actions", None)
+            if (actions and hasattr(cls, "as_async_view")
+                    and set(actions.values()) & set(cls.async_actions)):
+                url = URLPattern(
+                    url.pattern,
+                    cls.as_async_view(actions, **callback.initkwargs),
+                    url.default_args, url.name)
+            urls.append(url)
+        return urls
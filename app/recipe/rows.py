@@ -0,0 +1,137 @@
+"""
+plain row reads for the list endpoints.
+
+lists are read with .values() instead of model instances. many
+related primary keys are attached per page, aggregated into arrays
+by postgresql or read from the through tables elsewhere. rows are
+rendered by RowListSerializer with the serializer's own fields, so
+the output is the same as serializing instances.
+"""
+from collections import defaultdict
+from functools import lru_cache
+import django
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import OuterRef, Subquery
+from rest_framework import serializers
+from core.aio import fetch
+
+# ArrayAgg ordering was renamed in django 5.2.
+ARRAY_AGG_ORDER = "order_by" if django.VERSION >= (5, 2) else "ordering"
+
+
+@lru_cache(maxsize=None)
+def row_fields(serializer_class):
+    """
+    columns and many related fields rendered by the serializer class,
+    None when it renders anything else (nested serializers, methods,
+    dotted sources or foreign keys).
+    """
+    model = serializer_class.Meta.model
+    columns, relations = [model._meta.pk.attname], []
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        source = field.source
+        if isinstance(field, serializers.ManyRelatedField):
+            if not isinstance(
+                    field.child_relation, serializers.PrimaryKeyRelatedField):
+                return None
+            relations.append(source)
+            continue
+        if isinstance(field, (serializers.BaseSerializer,
+                              serializers.RelatedField,
+                              serializers.SerializerMethodField)):
+            return None
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+        if model_field.is_relation or not model_field.concrete:
+            return None
+        if source not in columns:
+            columns.append(source)
+    return tuple(columns), tuple(relations)
+
+
+def through_columns(model, name):
+    "through model, source and target columns of a many to many field."
+    field = model._meta.get_field(name)
+    return (field.remote_field.through,
+            f"{field.m2m_field_name()}_id",
+            f"{field.m2m_reverse_field_name()}_id")
+
+
+def relation_array(model, name):
+    "ordered array of the related primary keys, as a subquery."
+    through, source, target = through_columns(model, name)
+    return Subquery(
+        through.objects.filter(**{source: OuterRef("pk")})
+        .values(source)
+        .annotate(ids=ArrayAgg(target, **{ARRAY_AGG_ORDER: target}))
+        .values("ids"))
+
+
+def select_rows(queryset, serializer_class):
+    """
+    values queryset of the columns the serializer renders,
+    None when the serializer can not be fed plain rows.
+    annotations are kept, pagination may order by them.
+    """
+    fields = row_fields(serializer_class)
+    if fields is None:
+        return None
+    columns, relations = fields
+    queryset = queryset.prefetch_related(None)
+    if connections[queryset.db].vendor == "postgresql":
+        queryset = queryset.annotate(**{
+            f"{name}_ids": relation_array(queryset.model, name)
+            for name in relations})
+    return queryset.values(*columns, *queryset.query.annotations)
+
+
+def relation_pairs(rows, model, name, using):
+    """
+    (source, target) pairs query of a relation of the rows,
+    None when the rows carry the postgresql arrays.
+    """
+    if not rows or f"{name}_ids" in rows[0]:
+        return None
+    through, source, target = through_columns(model, name)
+    return through.objects.using(using).filter(**{
+        f"{source}__in": [row[model._meta.pk.attname] for row in rows]
+    }).order_by(source, target).values_list(source, target)
+
+
+def set_relation(rows, model, name, pairs):
+    "set the related primary key lists of the rows from the pairs."
+    key = f"{name}_ids"
+    if rows and key in rows[0]:
+        for row in rows:
+            row[name] = row.pop(key) or []
+        return
+    related = defaultdict(list)
+    for source_id, target_id in pairs or ():
+        related[source_id].append(target_id)
+    pk_name = model._meta.pk.attname
+    for row in rows:
+        row[name] = related.get(row[pk_name], [])
+
+
+def attach_relations(rows, model, serializer_class, using):
+    "set the related primary key lists of the rows, ordered by pk."
+    for name in row_fields(serializer_class)[1]:
+        pairs = relation_pairs(rows, model, name, using)
+        set_relation(rows, model, name, pairs)
+    return rows
+
+
+async def aattach_relations(rows, model, serializer_class, using):
+    "attach_relations with the pairs read by the async orm."
+    for name in row_fields(serializer_class)[1]:
+        pairs = relation_pairs(rows, model, name, using)
+        if pairs is not None:
+            pairs = await fetch(pairs)
+        set_relation(rows, model, name, pairs)
+    return rows
@@ -0,0 +1,121 @@
+"""
+full text search of recipes.
+
+on postgresql recipes are matched against their stored search
+vector (see migration 0011), weighted name > tags > ingredients
+and ranked with ts_rank. other databases fall back to an in
+process inverted index per owner, rebuilt whenever the count or
+the newest updated_at of the owner's recipes moves. tag and
+ingredient changes touch their recipes (see recipe.signals).
+"""
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    FloatField,
+    Value,
+    When)
+from django.db.models.functions import Cast
+from .cache import get_data_state
+from .models import Recipe
+
+# text search configuration of the stored search vectors.
+SEARCH_CONFIG = "english"
+
+# default weights of ts_rank for the A, B and C labels.
+NAME_WEIGHT = 1.0
+TAG_WEIGHT = 0.4
+INGREDIENT_WEIGHT = 0.2
+
+# owners whose fallback index is kept in memory.
+MAX_INDEXES = 128
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text.lower())
+
+
+class SearchIndex:
+    "in process inverted index of the recipes of one owner."
+
+    def __init__(self, owner_id):
+        self.postings = defaultdict(dict)
+        recipes = Recipe.objects.filter(owner_id=owner_id)
+        self.add(recipes.values_list("id", "name"), NAME_WEIGHT)
+        self.add(recipes.values_list("id", "tags__name"), TAG_WEIGHT)
+        self.add(
+            recipes.values_list("id", "ingredients__name"),
+            INGREDIENT_WEIGHT)
+
+    def add(self, rows, weight):
+        for recipe_id, text in rows:
+            for token in tokenize(text or ""):
+                weights = self.postings[token]
+                weights[recipe_id] = max(weights.get(recipe_id, 0), weight)
+
+    def search(self, text):
+        """
+        recipes matching every token of the text, with the sum
+        of the best weight of each token as their rank.
+        """
+        tokens = set(tokenize(text))
+        if not tokens:
+            return {}
+        postings = sorted(
+            (self.postings.get(token, {}) for token in tokens), key=len)
+        ranks = dict(postings[0])
+        for weights in postings[1:]:
+            ranks = {
+                recipe_id: rank + weights[recipe_id]
+                for recipe_id, rank in ranks.items()
+                if recipe_id in weights}
+        return ranks
+
+
+def get_search_index(owner_id):
+    "fallback index of the owner, rebuilt when its data changed."
+    version = get_data_state(Recipe.objects.filter(owner_id=owner_id))
+    with _lock:
+        entry = _indexes.get(owner_id)
+        if entry is not None and entry[0] == version:
+            _indexes.move_to_end(owner_id)
+            return entry[1]
+    index = SearchIndex(owner_id)
+    with _lock:
+        _indexes[owner_id] = (version, index)
+        _indexes.move_to_end(owner_id)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def search_recipes(queryset, text, owner_id):
+    """
+    recipes of the owner matching the search text,
+    annotated with their search_rank.
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        # fixed point ranks survive the cursor round trip exactly.
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F("search_vector"), query),
+                DecimalField(max_digits=12, decimal_places=9)))
+
+    by_rank = defaultdict(list)
+    for recipe_id, rank in get_search_index(owner_id).search(text).items():
+        by_rank[rank].append(recipe_id)
+    return queryset.filter(
+        pk__in=[pk for ids in by_rank.values() for pk in ids]).annotate(
+            search_rank=Case(
+                *[When(pk__in=ids, then=Value(rank))
+                  for rank, ids in by_rank.items()],
+                default=Value(0.0), output_field=FloatField()))
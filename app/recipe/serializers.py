@@ -1,8 +1,69 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
+from core.serializers import MeasuredDataMixin
+from .fields import OwnedPrimaryKeyRelatedField
+from .images import rendition_urls
 from .models import Tag, Ingredient, Recipe
 
 
-class TagSerializer(serializers.ModelSerializer):
+class RowListSerializer(MeasuredDataMixin, serializers.ListSerializer):
+    """
+    list serializer rendering plain rows (see recipe.rows) as well
+    as instances. rows skip the attribute lookups of the child
+    serializer, each value goes through its field's to_representation.
+    """
+
+    def to_representation(self, data):
+        if not isinstance(data, list) or not data \
+                or not isinstance(data[0], dict):
+            return super().to_representation(data)
+        plan = []
+        for field in self.child._readable_fields:
+            if isinstance(field, serializers.ManyRelatedField):
+                relation = field.child_relation
+                plan.append((field.field_name, field.source, (
+                    list if relation.pk_field is None else
+                    lambda pks, relation=relation: [
+                        relation.to_representation(PKOnlyObject(pk))
+                        for pk in pks])))
+            else:
+                plan.append((
+                    field.field_name, field.source, field.to_representation))
+        return [
+            {name: None if row[source] is None
+             else represent(row[source])
+             for name, source, represent in plan}
+            for row in data]
+
+
+class OwnerUniqueNameMixin:
+    """
+    rejects names the requesting user already owns when
+    RECIPE_UNIQUE_NAMES_PER_OWNER setting is enabled.
+    the lookup is served by the (owner, name) index.
+    """
+    unique_name_message = _('You already have an object with this name.')
+
+    def validate_name(self, value):
+        if not getattr(settings, "RECIPE_UNIQUE_NAMES_PER_OWNER", False):
+            return value
+        request = self.context.get('request')
+        if request is None:
+            return value
+        queryset = self.Meta.model.objects.filter(
+            owner=request.user, name=value)
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(
+                self.unique_name_message, code='unique')
+        return value
+
+
+class TagSerializer(MeasuredDataMixin, OwnerUniqueNameMixin,
+                    serializers.ModelSerializer):
     "serializes the tag instances."
 
     class Meta:
@@ -10,19 +71,22 @@ class TagSerializer(serializers.ModelSerializer):
         fields = [
             "id", "name"
         ]
+        list_serializer_class = RowListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(MeasuredDataMixin, OwnerUniqueNameMixin,
+                           serializers.ModelSerializer):
     "serializes the ingredient instances."
     class Meta:
         model = Ingredient
         fields = ["name", "id"]
+        list_serializer_class = RowListSerializer
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+class RecipeSerializer(MeasuredDataMixin, serializers.ModelSerializer):
+    tags = OwnedPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True)
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = OwnedPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), many=True
     )
 
@@ -38,6 +102,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "id"
         ]
+        list_serializer_class = RowListSerializer
         # extra_kwargs = {
         #     "tags": {
         #         "allow_blank": True,
@@ -48,18 +113,54 @@ class RecipeSerializer(serializers.ModelSerializer):
         # }
 
 
-class RecipeDetailSerializer(RecipeSerializer):
+class RenditionsMixin(serializers.Serializer):
+    "renders the rendition urls of the recipe image."
+    renditions = serializers.SerializerMethodField()
+
+    def get_renditions(self, recipe):
+        "rendition urls, available once the image is processed."
+        request = self.context.get('request')
+        urls = rendition_urls(recipe)
+        if request is not None:
+            urls = {kind: request.build_absolute_uri(url)
+                    for kind, url in urls.items()}
+        return urls
+
+
+class RecipeDetailSerializer(RenditionsMixin, RecipeSerializer):
     """serializes the single recipe object. inherit from recipe serializer"""
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientSerializer(many=True, read_only=True)
 
     class Meta(RecipeSerializer.Meta):
-        ...
+        fields = RecipeSerializer.Meta.fields + [
+            "image", "image_status", "renditions"]
+        read_only_fields = ["id", "image", "image_status"]
+
+
+class RecipeExportSerializer(RecipeDetailSerializer):
+    "serializes recipes for the cookbook export."
 
+    class Meta(RecipeDetailSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ["link"]
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+
+class RecipeImageSerializer(MeasuredDataMixin, RenditionsMixin,
+                            serializers.ModelSerializer):
     "serializes to recipe object image."
+
     class Meta:
         model = Recipe
-        fields = ["id", "image"]
-        read_only_fields = ("id",)
+        fields = ["id", "image", "image_status", "renditions"]
+        read_only_fields = ("id", "image_status")
+
+    def update(self, instance, validated_data):
+        "identical uploads reuse the stored file instead of a copy."
+        image = validated_data.get('image')
+        if image:
+            field = instance._meta.get_field('image')
+            instance.image = image
+            name = field.generate_filename(instance, image.name)
+            if field.storage.exists(name):
+                validated_data['image'] = name
+        return super().update(instance, validated_data)
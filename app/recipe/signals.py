@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db.models.signals import (
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed)
+from django.dispatch import receiver
+from django.utils import timezone
+from .cache import bump_user_version
+from .models import Tag, Ingredient, Recipe
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    "invalidate cached responses of the owner on every write."
+    bump_user_version(instance.owner_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_owner_cache_on_relation_change(
+        sender, instance, action, **kwargs):
+    "invalidate cached responses when recipe relations change."
+    if action.startswith("post_"):
+        bump_user_version(instance.owner_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reset_new_user_cache(sender, instance, created, **kwargs):
+    "new users always start with a fresh version token."
+    if created:
+        bump_user_version(instance.pk)
+
+
+def touch_recipes(queryset):
+    "mark recipes as modified without running their save signals."
+    queryset.update(updated_at=timezone.now())
+
+
+def touch_related_recipes(model, pks):
+    "touch the recipes of the tags or ingredients with the pks."
+    for field in Recipe._meta.many_to_many:
+        if field.related_model is model:
+            touch_recipes(Recipe.objects.filter(**{f"{field.name}__in": pks}))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipes_on_relation_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    recipe representations include their tag and ingredient ids,
+    so relation changes must move updated_at of the recipes.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif action in ("post_add", "post_remove"):
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+    elif action == "pre_clear":
+        touch_recipes(instance.recipe_set.all())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_on_related_change(sender, instance, **kwargs):
+    "renamed or deleted tags and ingredients change recipe details."
+    if kwargs.get("created"):
+        return
+    touch_recipes(instance.recipe_set.all())
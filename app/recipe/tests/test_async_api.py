@@ -0,0 +1,143 @@
+from urllib.parse import urlsplit
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve, reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.aio import iscoroutinefunction
+from core.metrics import registry
+from core.models import DeviceToken
+from user.authentication import token_cache
+from .. import cache
+from ..models import Tag, Ingredient, Recipe
+from ..urls import get_urlpatterns
+
+# the recipe urls with RECIPE_ASYNC_VIEWS set.
+urlpatterns = [
+    path('api/recipe/', include((get_urlpatterns(async_views=True),
+                                 'recipe'))),
+]
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class AsyncApiTests(TestCase):
+    "test the async list and retrieve views."
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.tag = Tag.objects.create(name="Sweet", owner=self.user)
+        self.sugar = Ingredient.objects.create(name="Sugar", owner=self.user)
+        self.recipes = []
+        for index in range(3):
+            recipe = Recipe.objects.create(
+                owner=self.user, name=f"cake {index}",
+                cook_minutes=10, price="5.50")
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.sugar)
+            self.recipes.append(recipe)
+
+    def get_both(self, url):
+        "the sync and the async response of a GET request."
+        cache.get_cache().clear()
+        sync = self.client.get(url)
+        cache.get_cache().clear()
+        with override_settings(ROOT_URLCONF=__name__):
+            self.assertTrue(
+                iscoroutinefunction(resolve(urlsplit(url).path).func))
+            token_cache.clear()
+            return sync, self.client.get(url)
+
+    def test_list_matches_sync(self):
+        "lists render the same bytes as the sync views."
+        for url in (RECIPES_URL, TAGS_URL, RECIPES_URL + '?page_size=2',
+                    RECIPES_URL + f'?tags={self.tag.id}&search=cake'):
+            sync, res = self.get_both(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.content, sync.content)
+            self.assertEqual(res['Allow'], sync['Allow'])
+
+    def test_next_page_matches_sync(self):
+        "cursors of the async pages lead to the same next page."
+        sync, res = self.get_both(RECIPES_URL + '?page_size=2')
+        next_url = res.json()['next']
+        sync, res = self.get_both(next_url)
+        self.assertEqual(res.content, sync.content)
+        self.assertEqual(
+            [recipe['name'] for recipe in res.json()['results']], ["cake 2"])
+
+    def test_retrieve_matches_sync(self):
+        "details render the same bytes as the sync views."
+        sync, res = self.get_both(detail_url(self.recipes[0].id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, sync.content)
+        self.assertEqual(res['Allow'], sync['Allow'])
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_retrieve_other_owner(self):
+        "recipes of other users are not found."
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        recipe = Recipe.objects.create(
+            owner=other, name="secret", cook_minutes=1, price=1)
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_authentication_required(self):
+        "missing and unknown tokens are rejected."
+        res = APIClient().get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token unknown")
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_device_token(self):
+        "device tokens authenticate the async views."
+        token, key = DeviceToken.objects.issue(self.user, "phone")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_serialization_recorded(self):
+        "the metrics include the serializer time of async views."
+        registry.reset()
+        cache.get_cache().clear()
+        self.client.get(RECIPES_URL)
+        totals = registry.views[('recipe:recipe-list', 'GET')].totals
+        self.assertGreater(totals['api_serialize_seconds_total'], 0)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_conditional_get(self):
+        "fresh client copies are answered with 304."
+        res = self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_writes_use_sync_views(self):
+        "other actions of the async routes still work."
+        res = self.client.post(RECIPES_URL, {
+            "name": "pie", "cook_minutes": 5, "price": "2.00",
+            "tags": [self.tag.id], "ingredients": []}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.delete(detail_url(self.recipes[0].id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            len(self.client.get(RECIPES_URL).json()['results']), 3)
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from ..models import Tag, Ingredient
+
+INGREDIENT_AUTOCOMPLETE = reverse('recipe:ingredient-autocomplete')
+TAG_AUTOCOMPLETE = reverse('recipe:tag-autocomplete')
+
+
+class AutocompleteApiTests(TestCase):
+    "test tag and ingredient name autocomplete."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+        for name in ("sugar", "Salt", "Sunflower oil", "Butter", "Sage"):
+            Ingredient.objects.create(name=name, owner=self.user)
+        Ingredient.objects.create(name="Saffron", owner=other)
+
+    def complete(self, url, **params):
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in res.data]
+
+    def test_autocomplete_prefix(self):
+        "owned names starting with the prefix, any case, in order."
+        self.assertEqual(
+            self.complete(INGREDIENT_AUTOCOMPLETE, prefix="s"),
+            ["Sage", "Salt", "sugar", "Sunflower oil"])
+        self.assertEqual(
+            self.complete(INGREDIENT_AUTOCOMPLETE, prefix="SU", limit=1),
+            ["sugar"])
+
+    def test_autocomplete_tags_with_q(self):
+        "tags are completed too, q is an alias of prefix."
+        Tag.objects.create(name="Vegan", owner=self.user)
+        Tag.objects.create(name="Vegetarian", owner=self.user)
+        self.assertEqual(
+            self.complete(TAG_AUTOCOMPLETE, q="vege"), ["Vegetarian"])
+
+    def test_repeat_keystrokes_served_from_memory(self):
+        "later keystrokes only check the names did not change."
+        self.complete(INGREDIENT_AUTOCOMPLETE, prefix="s")
+        with self.assertNumQueries(1):
+            self.complete(INGREDIENT_AUTOCOMPLETE, prefix="sa")
+
+    def test_new_names_are_completed(self):
+        "created ingredients show up in later completions."
+        self.complete(INGREDIENT_AUTOCOMPLETE, prefix="s")
+        Ingredient.objects.create(name="Sesame", owner=self.user)
+        self.assertEqual(
+            self.complete(INGREDIENT_AUTOCOMPLETE, prefix="se"), ["Sesame"])
+
+    def test_writes_of_other_processes_are_completed(self):
+        "rows written without bumping the version token show up."
+        self.complete(INGREDIENT_AUTOCOMPLETE, prefix="s")
+        with patch("recipe.signals.bump_user_version"):
+            Ingredient.objects.create(name="Sesame", owner=self.user)
+            Ingredient.objects.filter(name="Salt").update(
+                name="Sea salt", updated_at=timezone.now())
+        self.assertEqual(
+            self.complete(INGREDIENT_AUTOCOMPLETE, prefix="se"),
+            ["Sea salt", "Sesame"])
+
+    @override_settings(RECIPE_AUTOCOMPLETE_MAX_NAMES=2)
+    def test_large_owners_completed_from_database(self):
+        "owners over the trie limit get the same answers."
+        self.assertEqual(
+            self.complete(INGREDIENT_AUTOCOMPLETE, prefix="sa"),
+            ["Sage", "Salt"])
+
+    def test_invalid_autocomplete_request(self):
+        "prefix is required and limit is bounded."
+        for params in ({}, {"prefix": "s", "limit": 0},
+                       {"prefix": "s", "limit": "many"}):
+            res = self.client.get(INGREDIENT_AUTOCOMPLETE, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,159 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from ..models import Tag, Ingredient, Recipe
+
+RECIPE_BULK = reverse('recipe:recipe-bulk')
+TAG_BULK = reverse('recipe:tag-bulk')
+RECIPE_LIST = reverse('recipe:recipe-list')
+
+
+class BulkApiTests(TestCase):
+    "test bulk create, update and delete endpoints."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(name="Sweet", owner=self.user)
+        self.ingredient = Ingredient.objects.create(
+            name="Sugar", owner=self.user)
+
+    def recipe_payload(self, name, **kwargs):
+        payload = {
+            "name": name,
+            "cook_minutes": 10,
+            "price": "5.00",
+            "tags": [self.tag.id],
+            "ingredients": [self.ingredient.id],
+        }
+        payload.update(kwargs)
+        return payload
+
+    def test_bulk_create_recipes(self):
+        "recipes and their relations are created together."
+        payload = [self.recipe_payload(f"cake {index}") for index in range(3)]
+        res = self.client.post(RECIPE_BULK, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        recipes = Recipe.objects.filter(owner=self.user)
+        self.assertEqual(recipes.count(), 3)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(
+                list(recipe.ingredients.all()), [self.ingredient])
+
+    def test_bulk_create_reports_errors_per_item(self):
+        "one invalid item rejects the request and nothing is written."
+        payload = [
+            self.recipe_payload("cake"),
+            self.recipe_payload("", tags=[9999]),
+        ]
+        res = self.client.post(RECIPE_BULK, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertIn('tags', res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update_recipes(self):
+        "recipes are partially updated and relations replaced."
+        recipes = [
+            Recipe.objects.create(
+                owner=self.user, name=f"cake {index}",
+                cook_minutes=10, price=5)
+            for index in range(2)]
+        recipes[1].tags.add(self.tag)
+        payload = [
+            {"id": recipes[0].id, "name": "renamed", "tags": [self.tag.id]},
+            {"id": recipes[1].id, "tags": []},
+        ]
+        res = self.client.patch(RECIPE_BULK, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for recipe in recipes:
+            recipe.refresh_from_db()
+        self.assertEqual(recipes[0].name, "renamed")
+        self.assertEqual(list(recipes[0].tags.all()), [self.tag])
+        self.assertEqual(recipes[1].name, "cake 1")
+        self.assertFalse(recipes[1].tags.exists())
+
+    def test_bulk_update_unknown_id(self):
+        "updating recipes of another user is reported as not found."
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        recipe = Recipe.objects.create(
+            owner=other, name="cake", cook_minutes=10, price=5)
+        res = self.client.patch(
+            RECIPE_BULK, [{"id": recipe.id, "name": "mine"}], "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+
+    def test_bulk_delete_recipes(self):
+        "recipes are deleted together."
+        recipes = [
+            Recipe.objects.create(
+                owner=self.user, name=f"cake {index}",
+                cook_minutes=10, price=5)
+            for index in range(3)]
+        res = self.client.delete(
+            RECIPE_BULK, [recipes[0].id, recipes[1].id], "json")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(Recipe.objects.all()), [recipes[2]])
+
+    def test_bulk_create_tags_visible_in_list(self):
+        "bulk created tags invalidate the cached list."
+        self.client.get(reverse('recipe:tag-list'))
+        res = self.client.post(
+            TAG_BULK, [{"name": "Sour"}, {"name": "Salty"}], "json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(reverse('recipe:tag-list'))
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_bulk_request_must_be_a_list(self):
+        "non list payloads are rejected."
+        res = self.client.post(TAG_BULK, {"name": "Sour"}, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_tag_rename_changes_recipe_detail(self):
+        "renaming tags in bulk changes the etag of their recipes."
+        recipe = Recipe.objects.create(
+            owner=self.user, name="cake", cook_minutes=10, price=5)
+        recipe.tags.add(self.tag)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.patch(
+            TAG_BULK, [{"id": self.tag.id, "name": "Sour"}], "json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], "Sour")
+
+    @override_settings(RECIPE_UNIQUE_NAMES_PER_OWNER=True)
+    def test_bulk_create_duplicate_names(self):
+        "names repeated within the request are rejected per item."
+        res = self.client.post(
+            TAG_BULK, [{"name": "d"}, {"name": "e"}, {"name": "D"}], "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(res.data[1], {})
+        self.assertEqual(res.data[2]['name'][0].code, 'unique')
+        self.assertEqual(Tag.objects.filter(owner=self.user).count(), 1)
+
+    @override_settings(RECIPE_UNIQUE_NAMES_PER_OWNER=True)
+    def test_bulk_rename_duplicate_names(self):
+        "renames to the same name within the request are rejected."
+        other = Tag.objects.create(name="Salty", owner=self.user)
+        res = self.client.patch(TAG_BULK, [
+            {"id": self.tag.id, "name": "Sour"},
+            {"id": other.id, "name": "sour"}], "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertEqual(
+            sorted(Tag.objects.values_list("name", flat=True)),
+            ["Salty", "Sweet"])
@@ -0,0 +1,73 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from ..models import Tag, Recipe
+from .. import cache
+
+TAG_LIST = reverse('recipe:tag-list')
+
+
+def sample_user(email="test@test.com", password="supersecret"):
+    "helper function of creating a sample user."
+    return get_user_model().objects.create_user(email, password)
+
+
+class ResponseCacheTests(TestCase):
+    "test per user response cache of the list endpoints."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def test_cached_list_skips_list_queries(self):
+        "second request of the same list is served from the cache."
+        Tag.objects.create(name="Desert", owner=self.user)
+        first = self.client.get(TAG_LIST)
+        # only the conditional get validators are queried.
+        with self.assertNumQueries(1):
+            second = self.client.get(TAG_LIST)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    def test_write_invalidates_cached_list(self):
+        "creating a tag is visible on the next list request."
+        self.client.get(TAG_LIST)
+        self.client.post(TAG_LIST, {"name": "Fruit"}, "json")
+        res = self.client.get(TAG_LIST)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_relation_change_invalidates_cached_detail(self):
+        "adding a tag to a recipe invalidates its cached detail."
+        recipe = Recipe.objects.create(
+            owner=self.user, name="Cake", cook_minutes=10, price=5)
+        url = reverse('recipe:recipe-detail', kwargs={"pk": recipe.id})
+        self.client.get(url)
+        recipe.tags.add(Tag.objects.create(name="Sweet", owner=self.user))
+        res = self.client.get(url)
+        self.assertEqual(len(res.data['tags']), 1)
+
+    def test_version_bump_is_per_user(self):
+        "writes of one user keep the cache of other users."
+        other = sample_user(email="other@test.com")
+        version = cache.get_user_version(self.user.pk)
+        Tag.objects.create(name="Fruit", owner=other)
+        self.assertEqual(cache.get_user_version(self.user.pk), version)
+
+    def test_missed_bump_not_served(self):
+        "writes that did not bump the version are not served stale."
+        tag = Tag.objects.create(name="Desert", owner=self.user)
+        etag = self.client.get(TAG_LIST)['ETag']
+        # another process wrote the tag, its bump went to its own
+        # in process cache.
+        Tag.objects.filter(pk=tag.pk).update(
+            name="Dessert", updated_at=timezone.now())
+
+        res = self.client.get(TAG_LIST, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['name'], "Dessert")
+        res = self.client.get(TAG_LIST, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
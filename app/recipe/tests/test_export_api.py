@@ -0,0 +1,107 @@
+import json
+from unittest import skipIf
+from unittest.mock import patch
+import django
+from django.test import AsyncClient, TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from ..api import ExportRecipes
+from ..models import Tag, Ingredient, Recipe
+
+EXPORT_URL = reverse('recipe:export')
+
+
+class ExportApiTests(TestCase):
+    "test the streaming cookbook export."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.tag = Tag.objects.create(name="Sweet", owner=self.user)
+        self.sugar = Ingredient.objects.create(name="Sugar", owner=self.user)
+        for index in range(5):
+            recipe = Recipe.objects.create(
+                owner=self.user, name=f"cake {index}",
+                cook_minutes=10, price="5.50")
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.sugar)
+
+    def export(self):
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], "application/x-ndjson")
+        return [json.loads(line)
+                for line in b"".join(res.streaming_content).splitlines()]
+
+    def test_login_required(self):
+        "anonymous users can not export."
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_recipes(self):
+        "every owned recipe is a line with its relations."
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        Recipe.objects.create(
+            owner=other, name="secret", cook_minutes=1, price=1)
+        self.client.force_authenticate(self.user)
+        lines = self.export()
+        self.assertEqual(
+            [line['name'] for line in lines],
+            [f"cake {index}" for index in range(5)])
+        self.assertEqual(lines[0]['price'], "5.50")
+        self.assertEqual(
+            lines[0]['tags'], [{"id": self.tag.id, "name": "Sweet"}])
+        self.assertEqual(
+            lines[0]['ingredients'], [{"name": "Sugar", "id": self.sugar.id}])
+
+    def test_export_negotiated(self):
+        "the ndjson and json media types are both accepted."
+        self.client.force_authenticate(self.user)
+        for accept in ("application/x-ndjson", "application/json"):
+            res = self.client.get(EXPORT_URL, HTTP_ACCEPT=accept)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], "application/x-ndjson")
+            self.assertEqual(
+                len(b"".join(res.streaming_content).splitlines()), 5)
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT="text/csv")
+        self.assertEqual(res.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    def test_errors_rendered_as_ndjson(self):
+        "errors of ndjson requests are one json line."
+        res = self.client.get(
+            EXPORT_URL, HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['Content-Type'], "application/x-ndjson")
+        self.assertIn("detail", json.loads(res.content))
+
+    def test_export_queries_per_chunk(self):
+        "relations are loaded with one query each per chunk."
+        self.client.force_authenticate(self.user)
+        with patch.object(ExportRecipes, "chunk_size", 2):
+            res = self.client.get(EXPORT_URL)
+            # recipes once, tags and ingredients for each of 3 chunks.
+            with self.assertNumQueries(7):
+                content = b"".join(res.streaming_content)
+        self.assertEqual(len(content.splitlines()), 5)
+
+    @skipIf(django.VERSION < (4, 2), "async streaming needs django 4.2")
+    async def test_export_async_iterator(self):
+        "under ASGI the export is streamed from an async iterator."
+        token = await Token.objects.acreate(user=self.user)
+        with patch.object(ExportRecipes, "chunk_size", 2):
+            res = await AsyncClient().get(
+                EXPORT_URL, headers={"Authorization": f"Token {token.key}"})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(res.is_async)
+            blocks = [block async for block in res.streaming_content]
+        self.assertEqual(len(blocks), 3)
+        self.assertEqual(
+            [json.loads(line)['name']
+             for line in b"".join(blocks).splitlines()],
+            [f"cake {index}" for index in range(5)])
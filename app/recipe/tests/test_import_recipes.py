@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from ..models import Tag, Ingredient, Recipe
+
+
+class ImportRecipesTests(TestCase):
+    "test the import_recipes command."
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.sweet = Tag.objects.create(name="Sweet", owner=self.user)
+
+    def write(self, suffix, content):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8")
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def run_import(self, path, **options):
+        out = StringIO()
+        call_command(
+            "import_recipes", path, owner="test@test.com",
+            stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        "recipes are imported with existing and new relations."
+        lines = [
+            {"name": "Cake", "cook_minutes": 30, "price": "7.50",
+             "tags": ["Sweet", "Baked"], "ingredients": ["Sugar"]},
+            {"name": "Pie", "cook_minutes": 40, "price": 9,
+             "tags": [{"id": 99, "name": "Baked"}], "ingredients": []},
+        ]
+        path = self.write(
+            ".ndjson", "\n".join(json.dumps(line) for line in lines))
+        out = self.run_import(path, batch_size=1)
+
+        self.assertIn("Imported 2 recipes", out)
+        self.assertIn("rows/s", out)
+        cake = Recipe.objects.get(owner=self.user, name="Cake")
+        self.assertEqual(
+            sorted(tag.name for tag in cake.tags.all()), ["Baked", "Sweet"])
+        self.assertIn(self.sweet, cake.tags.all())
+        self.assertEqual(Tag.objects.filter(name="Baked").count(), 1)
+        self.assertEqual(
+            [ingredient.name for ingredient in cake.ingredients.all()],
+            ["Sugar"])
+        pie = Recipe.objects.get(owner=self.user, name="Pie")
+        self.assertEqual(str(pie.price), "9.00")
+
+    def test_import_csv(self):
+        "csv cells hold the names separated by a pipe."
+        path = self.write(".csv", (
+            "name,cook_minutes,price,link,tags,ingredients\n"
+            "Soup,15,4.20,http://soup.io,Sweet|Warm,Tomato | Salt\n"))
+        self.run_import(path)
+        soup = Recipe.objects.get(owner=self.user)
+        self.assertEqual(soup.link, "http://soup.io")
+        self.assertEqual(soup.tags.count(), 2)
+        self.assertEqual(
+            set(Ingredient.objects.values_list("name", flat=True)),
+            {"Tomato", "Salt"})
+
+    def test_invalid_record_rolls_back(self):
+        "an invalid line imports nothing and is reported."
+        path = self.write(".ndjson", "\n".join([
+            json.dumps({"name": "Cake", "cook_minutes": 30, "price": 1,
+                        "tags": ["New"]}),
+            json.dumps({"name": "Pie", "cook_minutes": -1, "price": 1}),
+        ]))
+        with self.assertRaisesRegex(CommandError, "line 2: cook_minutes"):
+            self.run_import(path, batch_size=1)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.filter(name="New").exists())
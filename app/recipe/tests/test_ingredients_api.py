@@ -46,7 +46,7 @@ class PrivateIngredientApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         ingredients = Ingredient.objects.filter(owner=self.user)
         serializer = IngredientSerializer(ingredients, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_create_new_ingredient(self):
         "test create new ingreient"
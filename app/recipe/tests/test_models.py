@@ -1,5 +1,9 @@
 from django.test import TestCase
-from ..models import generate_recipe_image_path
+from django.core.files.uploadedfile import SimpleUploadedFile
+from ..models import (
+    Recipe,
+    generate_recipe_image_path,
+    generate_content_addressed_image_path)
 from unittest.mock import patch
 
 
@@ -14,3 +18,14 @@ class ModelTests(TestCase):
             None, "my_image.jpg")
         expected_path = f"uploads/recipe/{uuid}.jpg"
         self.assertEqual(file_path, expected_path)
+
+    def test_content_addressed_image_path(self):
+        "identical content generates the same path."
+        recipe = Recipe(image=SimpleUploadedFile("a.JPG", b"content"))
+        other = Recipe(image=SimpleUploadedFile("b.jpg", b"content"))
+        file_path = generate_content_addressed_image_path(recipe, "a.JPG")
+        self.assertEqual(
+            file_path,
+            generate_content_addressed_image_path(other, "b.jpg"))
+        self.assertRegex(
+            file_path, r"^uploads/recipe/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
@@ -1,11 +1,25 @@
 import os
 import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
 from PIL import Image
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 from rest_framework import status
 from django.urls import reverse
-from ..serializers import RecipeSerializer, RecipeDetailSerializer
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.http import http_date
+from ..serializers import (
+    RecipeSerializer,
+    RecipeDetailSerializer,
+    RecipeImageSerializer)
+from ..api.manage_recipes import plan_queryset
+from ..images import RENDITIONS, rendition_name, process_recipe_image
 from ..models import Ingredient, Tag, Recipe
 from django.contrib.auth import get_user_model
 
@@ -69,7 +83,7 @@ class PrivateApiTests(TestCase):
             Recipe.objects.filter(
                 owner=self.user), many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrieve_one_recipe(self):
         "test retrive a single recipe object detail."
@@ -192,6 +206,382 @@ class PrivateApiTests(TestCase):
         self.assertEqual(recipe.tags.all().count(), 1)
         self.assertEqual(recipe.name, payload['name'])
 
+    def test_create_recipe_with_other_users_tag(self):
+        "tags owned by another user can not be attached."
+        new_user = get_user_model().objects.create_user(
+            email="new@test.com", password="supersecret")
+        tag = Tag.objects.create(name="foreign tag", owner=new_user)
+        payload = {
+            "name": "Chocolate cake",
+            "cook_minutes": 12,
+            "price": 25,
+            "tags": [tag.id],
+            "ingredients": []
+        }
+        res = self.client.post(RECIPE_LIST, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_serializer_without_owner_rejects_tags(self):
+        "without a request or owner in the context no tag is accepted."
+        tag = Tag.objects.create(name="Dessert", owner=self.user)
+        payload = {"name": "Chocolate cake", "cook_minutes": 12,
+                   "price": 25, "tags": [tag.id], "ingredients": []}
+        serializer = RecipeSerializer(data=payload)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('tags', serializer.errors)
+
+    def test_serializer_owner_context(self):
+        "an owner in the context scopes the related objects."
+        tag = Tag.objects.create(name="Dessert", owner=self.user)
+        new_user = get_user_model().objects.create_user(
+            email="new@test.com", password="supersecret")
+        payload = {"name": "Chocolate cake", "cook_minutes": 12,
+                   "price": 25, "tags": [tag.id], "ingredients": []}
+        serializer = RecipeSerializer(
+            data=payload, context={"owner": self.user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer = RecipeSerializer(
+            data=payload, context={"owner": new_user})
+        self.assertFalse(serializer.is_valid())
+
+    def test_related_pks_validated_in_one_query(self):
+        "all submitted pks of a relation are resolved together."
+        ingredients = [
+            Ingredient.objects.create(name=f"ingredient {index}",
+                                      owner=self.user)
+            for index in range(10)]
+        payload = {
+            "name": "Chocolate cake",
+            "cook_minutes": 12,
+            "price": 25,
+            "tags": [],
+            "ingredients": [ingredient.id for ingredient in ingredients]
+        }
+        request = SimpleNamespace(user=self.user)
+        serializer = RecipeSerializer(
+            data=payload, context={"request": request})
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(
+            serializer.validated_data['ingredients'], ingredients)
+
+    def test_missing_pks_reported_together(self):
+        "every missing pk is reported in a single error."
+        tag = Tag.objects.create(name="tag", owner=self.user)
+        payload = {
+            "name": "Chocolate cake",
+            "cook_minutes": 12,
+            "price": 25,
+            "tags": [tag.id, 9998, 9999],
+            "ingredients": []
+        }
+        res = self.client.post(RECIPE_LIST, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('9998', res.data['tags'][0])
+        self.assertIn('9999', res.data['tags'][0])
+
+
+class RecipeQueryCountTests(TestCase):
+    "test recipe endpoints run a constant number of queries."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+
+    def create_recipes(self, count):
+        "create recipes with a tag and an ingredient each."
+        for index in range(count):
+            recipe = create_new_recipe(self.user, name=f"recipe {index}")
+            recipe.tags.add(Tag.objects.create(
+                name=f"tag {index}", owner=self.user))
+            recipe.ingredients.add(Ingredient.objects.create(
+                name=f"ingredient {index}", owner=self.user))
+
+    def test_list_query_count_is_constant(self):
+        "recipe list runs the same queries for any page size."
+        self.create_recipes(25)
+        # conditional get validators, recipes and one query per many
+        # related field, unless postgresql aggregates them in place.
+        queries = 2 if connection.vendor == "postgresql" else 4
+        for page_size in (1, 5, 20):
+            with self.assertNumQueries(queries):
+                res = self.client.get(
+                    RECIPE_LIST, {"page_size": page_size})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['results']), page_size)
+
+    def test_retrieve_query_count_is_constant(self):
+        "recipe detail runs the same queries for any number of tags."
+        recipe = create_new_recipe(self.user)
+        for count in (1, 10):
+            for index in range(count):
+                recipe.tags.add(Tag.objects.create(
+                    name=f"tag {count} {index}", owner=self.user))
+            with self.assertNumQueries(4):
+                res = self.client.get(populate_recipe_detail_url(recipe.id))
+            self.assertEqual(len(res.data['tags']), recipe.tags.count())
+
+
+class RecipePaginationTests(TestCase):
+    "test cursor pagination of the recipe list."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+        for index in range(5):
+            create_new_recipe(self.user, name=f"recipe {index}")
+
+    def test_walk_pages_with_cursor(self):
+        "following the next links returns every recipe once in id order."
+        ids = []
+        res = self.client.get(RECIPE_LIST, {"page_size": 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(recipe['id'] for recipe in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        expected = list(Recipe.objects.filter(
+            owner=self.user).order_by('id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    @override_settings(RECIPE_API_MAX_PAGE_SIZE=3)
+    def test_page_size_ceiling(self):
+        "requested page size can not exceed the configured ceiling."
+        res = self.client.get(RECIPE_LIST, {"page_size": 1000})
+        self.assertEqual(len(res.data['results']), 3)
+
+
+class RecipeRowListTests(TestCase):
+    "test recipe lists rendered from plain rows."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+
+    def test_rows_render_like_instances(self):
+        "list body is byte for byte the serialized instances."
+        tags = [Tag.objects.create(name=f"tag {index}", owner=self.user)
+                for index in range(3)]
+        salt = Ingredient.objects.create(name="Salt", owner=self.user)
+        recipe = create_new_recipe(self.user, price="7.50")
+        recipe.tags.add(tags[2], tags[0])
+        recipe.ingredients.add(salt)
+        create_new_recipe(self.user, name="Plain", link="http://a.io")
+        recipes = plan_queryset(
+            Recipe.objects.filter(owner=self.user).order_by("id"),
+            RecipeSerializer)
+        expected = JSONRenderer().render(
+            RecipeSerializer(recipes, many=True).data)
+
+        res = self.client.get(RECIPE_LIST)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(expected, res.content)
+        self.assertEqual(
+            res.data['results'][0]['tags'], [tags[0].id, tags[2].id])
+
+
+class RecipeFilterTests(TestCase):
+    "test filtering the recipe list."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(name="Vegan", owner=self.user)
+        self.quick = Tag.objects.create(name="Quick", owner=self.user)
+        self.tofu = Ingredient.objects.create(name="Tofu", owner=self.user)
+        self.salad = create_new_recipe(
+            self.user, name="Salad", cook_minutes=5, price=4)
+        self.salad.tags.add(self.vegan, self.quick)
+        self.curry = create_new_recipe(
+            self.user, name="Curry", cook_minutes=40, price=12)
+        self.curry.tags.add(self.vegan)
+        self.curry.ingredients.add(self.tofu)
+        self.steak = create_new_recipe(
+            self.user, name="Steak", cook_minutes=20, price=30)
+
+    def get_names(self, params):
+        res = self.client.get(RECIPE_LIST, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(recipe['name'] for recipe in res.data['results'])
+
+    def test_filter_tags_all(self):
+        "recipes must have every requested tag by default."
+        params = {"tags": f"{self.vegan.id},{self.quick.id}"}
+        self.assertEqual(self.get_names(params), ["Salad"])
+
+    def test_filter_tags_any(self):
+        "match=any returns recipes with at least one requested tag."
+        params = {"tags": f"{self.vegan.id},{self.quick.id}",
+                  "match": "any"}
+        self.assertEqual(self.get_names(params), ["Curry", "Salad"])
+
+    def test_filter_tags_and_ingredients(self):
+        "relation filters are combined."
+        params = {"tags": str(self.vegan.id),
+                  "ingredients": str(self.tofu.id)}
+        self.assertEqual(self.get_names(params), ["Curry"])
+
+    def test_filter_cook_minutes_and_price(self):
+        "cook minutes and price upper bounds are inclusive."
+        self.assertEqual(
+            self.get_names({"max_cook_minutes": 20}), ["Salad", "Steak"])
+        self.assertEqual(
+            self.get_names({"max_cook_minutes": 20, "price_lte": "4.00"}),
+            ["Salad"])
+
+    def test_invalid_filter(self):
+        "malformed filter values are rejected."
+        for params in ({"tags": "1,x"}, {"price_lte": "cheap"},
+                       {"match": "some"}):
+            res = self.client.get(RECIPE_LIST, params)
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSearchTests(TestCase):
+    "test full text search of the recipe list."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+        self.chocolate = Tag.objects.create(
+            name="Chocolate", owner=self.user)
+        self.cake = create_new_recipe(self.user, name="Chocolate cake")
+        self.cookies = create_new_recipe(self.user, name="Cookies")
+        self.cookies.tags.add(self.chocolate)
+        self.soup = create_new_recipe(self.user, name="Tomato soup")
+
+    def search(self, text, **params):
+        res = self.client.get(RECIPE_LIST, {"search": text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['name'] for recipe in res.data['results']]
+
+    def test_search_ranks_name_over_tags(self):
+        "recipes matching by name come before those matching by tag."
+        self.assertEqual(
+            self.search("chocolate"), ["Chocolate cake", "Cookies"])
+
+    def test_search_matches_every_word(self):
+        "every word of the search must match."
+        self.assertEqual(self.search("chocolate cake"), ["Chocolate cake"])
+        self.assertEqual(self.search("tomato cake"), [])
+
+    def test_search_follows_tag_rename(self):
+        "renamed tags are searchable right away."
+        self.chocolate.name = "Vanilla"
+        self.chocolate.save()
+        self.assertEqual(self.search("vanilla"), ["Cookies"])
+        self.assertEqual(self.search("chocolate"), ["Chocolate cake"])
+
+    def test_search_follows_writes_of_other_processes(self):
+        "recipes written without bumping the version token match."
+        self.search("chocolate")
+        with patch("recipe.signals.bump_user_version"):
+            create_new_recipe(self.user, name="Chocolate mousse")
+        self.assertEqual(self.search("mousse"), ["Chocolate mousse"])
+
+    def test_search_limited_to_user(self):
+        "recipes of other users never match."
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        create_new_recipe(other, name="Chocolate tart")
+        self.assertEqual(
+            self.search("chocolate"), ["Chocolate cake", "Cookies"])
+
+    def test_search_pages_keep_rank_order(self):
+        "ranked results are paginated without gaps or repeats."
+        res = self.client.get(
+            RECIPE_LIST, {"search": "chocolate", "page_size": 1})
+        names = [recipe['name'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names += [recipe['name'] for recipe in res.data['results']]
+        self.assertEqual(names, ["Chocolate cake", "Cookies"])
+        self.assertIsNone(res.data['next'])
+
+
+class ConditionalGetTests(TestCase):
+    "test etag and last modified validators of recipe endpoints."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.client.force_authenticate(self.user)
+        self.recipe = create_new_recipe(self.user)
+
+    def test_list_not_modified(self):
+        "unchanged list is answered with 304 and an empty body."
+        res = self.client.get(RECIPE_LIST)
+        self.assertIn('ETag', res)
+        self.assertNotIn('Last-Modified', res)
+        res = self.client.get(
+            RECIPE_LIST, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_list_modified_after_write(self):
+        "new recipe changes the etag of the list."
+        etag = self.client.get(RECIPE_LIST)['ETag']
+        create_new_recipe(self.user, name="another")
+        res = self.client.get(RECIPE_LIST, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_modified_after_older_delete(self):
+        "deleting a row that is not the newest is not answered with 304."
+        older = create_new_recipe(self.user, name="older")
+        Recipe.objects.filter(pk=older.pk).update(
+            updated_at=timezone.now() - timedelta(days=1))
+        res = self.client.get(RECIPE_LIST)
+        etag = res['ETag']
+        since = http_date(time.time() + 3600)
+
+        older.delete()
+        res = self.client.get(RECIPE_LIST, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        res = self.client.get(RECIPE_LIST, HTTP_IF_NONE_MATCH=etag,
+                              HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_last_modified(self):
+        "details carry the last modified date of the recipe."
+        url = populate_recipe_detail_url(self.recipe.id)
+        res = self.client.get(url)
+        self.assertIn('Last-Modified', res)
+        res = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_after_tag_rename(self):
+        "renaming a tag of the recipe changes the detail etag."
+        tag = Tag.objects.create(name="tag", owner=self.user)
+        self.recipe.tags.add(tag)
+        url = populate_recipe_detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        tag.name = "renamed"
+        tag.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], "renamed")
+
 
 def recie_image_upload_url(recipe):
     "populate the recipe image upload url."
@@ -210,21 +600,104 @@ class RecipeImageUploadTests(TestCase):
         self.client.force_authenticate(self.user)
 
     def tearDown(self):
+        if self.recipe.image:
+            for kind in RENDITIONS:
+                default_storage.delete(
+                    rendition_name(self.recipe.image.name, kind))
         self.recipe.image.delete()
 
-    def test_recipe_image_upload(self):
-        "test to recipe image upload with temp file."
+    def upload_sample_image(self, size=(100, 100)):
+        "upload a generated jpeg image to the recipe."
         with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
-            img = Image.new('RGB', (100, 100))
+            img = Image.new('RGB', size)
             img.save(ntf, format="JPEG")
             ntf.seek(0)
             url = recie_image_upload_url(self.recipe)
             payload = {"image": ntf}
-            res = self.client.post(url, payload, format="multipart")
+            return self.client.post(url, payload, format="multipart")
+
+    def test_recipe_image_upload(self):
+        "test to recipe image upload with temp file."
+        res = self.upload_sample_image()
         self.recipe.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+        self.assertEqual(res.data['renditions'], {})
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_recipe_image_renditions(self):
+        "processed images expose their rendition urls."
+        self.upload_sample_image(size=(1200, 600))
+        process_recipe_image(self.recipe.id)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+
+        thumbnail = rendition_name(self.recipe.image.name, "thumbnail")
+        with default_storage.open(thumbnail) as rendition:
+            self.assertEqual(Image.open(rendition).size, (150, 75))
+        data = RecipeImageSerializer(self.recipe).data
+        self.assertTrue(data['renditions']['thumbnail'].endswith(
+            "_thumbnail.jpg"))
+
+    @override_settings(RECIPE_IMAGE_PROCESSING="sync")
+    def test_recipe_detail_renditions(self):
+        "the recipe detail serves the renditions once processed."
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.upload_sample_image(size=(1200, 600))
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+
+        res = self.client.get(populate_recipe_detail_url(self.recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.assertTrue(res.data['image'].endswith(self.recipe.image.name))
+        self.assertEqual(
+            res.data['renditions']['thumbnail'],
+            'http://testserver' + default_storage.url(
+                rendition_name(self.recipe.image.name, "thumbnail")))
+
+    def test_identical_uploads_stored_once(self):
+        "uploads with the same content share the stored file."
+        self.upload_sample_image()
+        other = create_new_recipe(self.user, name="other")
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new('RGB', (100, 100)).save(ntf, format="JPEG")
+            ntf.seek(0)
+            res = self.client.post(recie_image_upload_url(other),
+                                   {"image": ntf}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+
+    def test_reject_decompression_bomb(self):
+        "images with too many pixels are rejected from their header."
+        with tempfile.NamedTemporaryFile(suffix=".png") as ntf:
+            Image.new('1', (8000, 6000)).save(ntf, format="PNG")
+            ntf.seek(0)
+            url = recie_image_upload_url(self.recipe)
+            res = self.client.post(url, {"image": ntf}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', str(res.data['image'][0]))
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100)
+    def test_reject_oversize_upload(self):
+        "uploads above the size limit are rejected while streaming."
+        res = self.upload_sample_image()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('bytes', str(res.data['image'][0]))
+
+    def test_reject_file_that_is_not_an_image(self):
+        "files without an image signature are rejected."
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            ntf.write(b"definitely not an image" * 10)
+            ntf.seek(0)
+            url = recie_image_upload_url(self.recipe)
+            res = self.client.post(url, {"image": ntf}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_invalid_image_payload(self):
         "test invalid image "
         payload = {"image": "bad bad"}
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.urls import reverse
 from rest_framework import status
@@ -45,7 +45,7 @@ class PrivateTagsApiTest(TestCase):
         res = self.client.get(TAG_LIST)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         serializer = TagSerializer(Tag.objects.all(), many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tag_list_filtered_user(self):
         "test tags were filtered by the user."
@@ -55,7 +55,7 @@ class PrivateTagsApiTest(TestCase):
 
         res = self.client.get(TAG_LIST)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data['results']), 2)
         self.assertEqual(Tag.objects.all().count(), 3)
 
     def test_create_new_tag(self):
@@ -71,3 +71,14 @@ class PrivateTagsApiTest(TestCase):
         payload = {"name": ""}
         res = self.client.post(TAG_LIST, payload, "json")
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_UNIQUE_NAMES_PER_OWNER=True)
+    def test_create_duplicate_tag_name(self):
+        "owner scoped unique names reject a name the user already owns."
+        Tag.objects.create(name="Desert", owner=self.user)
+        Tag.objects.create(name="Fruit", owner=self.user2)
+
+        res = self.client.post(TAG_LIST, {"name": "Desert"}, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(TAG_LIST, {"name": "Fruit"}, "json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,78 @@
+import hashlib
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    StopUpload,
+    TemporaryFileUploadHandler)
+from django.utils.translation import gettext_lazy as _
+from .images import sniff_image
+
+# jpeg headers may carry large exif segments before the image size.
+MAX_HEADER_BYTES = 256 * 1024
+
+INVALID_IMAGE = _('Upload a valid image. The file you uploaded was '
+                  'either not an image or a corrupted image.')
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    streams recipe image uploads to disk in chunks.
+    the format and size are read from the first bytes, oversize
+    files and decompression bombs are rejected before the rest
+    of the body is stored. the sha256 of the content is computed
+    on the way, for the content addressed image path.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.error = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b""
+        self.image_info = None
+        self.received = 0
+        self.digest = hashlib.sha256()
+
+    def reject(self, message):
+        "stop the upload. the remaining body is read but not stored."
+        self.error = message
+        raise StopUpload(connection_reset=False)
+
+    def check_header(self, raw_data):
+        self.header += raw_data
+        try:
+            info = sniff_image(self.header)
+        except ValueError:
+            self.reject(INVALID_IMAGE)
+        if info is None:
+            if len(self.header) > MAX_HEADER_BYTES:
+                self.reject(_('Could not read the image size.'))
+            return
+        image_format, width, height = info
+        max_pixels = getattr(settings, "RECIPE_IMAGE_MAX_PIXELS", 40000000)
+        if width * height > max_pixels:
+            self.reject(_('Ensure the image has at most {max_pixels} '
+                          'pixels.').format(max_pixels=max_pixels))
+        self.image_info = info
+        self.header = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        max_bytes = getattr(settings, "RECIPE_IMAGE_MAX_BYTES", 10485760)
+        if self.received > max_bytes:
+            self.reject(_('Ensure the image is at most {max_bytes} '
+                          'bytes.').format(max_bytes=max_bytes))
+        if self.image_info is None:
+            self.check_header(raw_data)
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if self.image_info is None:
+            # too short to carry an image header.
+            self.error = INVALID_IMAGE
+            file.close()
+            return None
+        file.content_sha256 = self.digest.hexdigest()
+        return file
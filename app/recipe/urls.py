@@ -1,17 +1,27 @@
+from django.conf import settings
 from rest_framework import routers
 from django.urls import path, include
-from .api import ManageTagViewSet, ManageIngredient, ManageRecipe
+from .api import (
+    ManageTagViewSet,
+    ManageIngredient,
+    ManageRecipe,
+    ExportRecipes)
+from .routers import AsyncReadRouter
 
 
 app_name = "recipe"
 
 
-router = routers.DefaultRouter()
+def get_urlpatterns(async_views=False):
+    "url patterns of the api, with async list and retrieve views or not."
+    router = AsyncReadRouter() if async_views else routers.DefaultRouter()
+    router.register("tags", ManageTagViewSet)
+    router.register('ingredients', ManageIngredient)
+    router.register('recipes', ManageRecipe)
+    return [
+        path("export/", ExportRecipes.as_view(), name="export"),
+        path("", include(router.urls))
+    ]
 
-router.register("tags", ManageTagViewSet)
-router.register('ingredients', ManageIngredient)
-router.register('recipes', ManageRecipe)
 
-urlpatterns = [
-    path("", include(router.urls))
-]
+urlpatterns = get_urlpatterns(getattr(settings, "RECIPE_ASYNC_VIEWS", False))
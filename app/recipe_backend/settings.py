@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -87,9 +88,28 @@ DATABASES = {
         "NAME": os.environ.get('DB_NAME'),
         "USER": os.environ.get('DB_USER'),
         "PASSWORD": os.environ.get('DB_PASS'),
+        # seconds a connection is reused across requests, 0 closes
+        # it after every request. the health check (django >= 4.1)
+        # replaces connections that broke while idle.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get(
+            "DB_CONN_HEALTH_CHECKS", "1") == "1",
+        "OPTIONS": {},
     }
 }
 
+# with DB_POOL=1 connections come from an in process psycopg pool
+# (django >= 5.1 with psycopg[pool]) instead of being kept per
+# thread. prefer it under ASGI, where persistent connections are
+# bound to the threads of sync_to_async.
+if os.environ.get("DB_POOL", "") == "1":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        "timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -103,6 +123,34 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator", },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.0/topics/auth/passwords/
+
+# preferred hasher of new passwords: "pbkdf2", "argon2" (needs
+# argon2-cffi) or "bcrypt" (needs bcrypt). the other hashers stay
+# listed so existing hashes still verify, and they are rehashed
+# with the preferred one on the next login.
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+}
+PASSWORD_HASHER_PROFILE = os.environ.get("PASSWORD_HASHER_PROFILE", "pbkdf2")
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for hasher in (
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.Argon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    ) if hasher != PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]]
+
+# where obtain-token checks passwords: "inline" in the request
+# thread, "pool" in a pool of LOGIN_POOL_WORKERS threads. logins
+# past LOGIN_POOL_QUEUE waiting checks are answered with 429.
+LOGIN_PASSWORD_CHECKS = os.environ.get("LOGIN_PASSWORD_CHECKS", "inline")
+LOGIN_POOL_WORKERS = int(os.environ.get("LOGIN_POOL_WORKERS", 2))
+LOGIN_POOL_QUEUE = int(os.environ.get("LOGIN_POOL_QUEUE", 16))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -129,3 +177,92 @@ MEDIA_ROOT = "/vol/web/media"
 STATIC_ROOT = "/vol/web/static"
 
 AUTH_USER_MODEL = "core.User"
+
+# json is rendered and parsed with orjson or ujson when installed.
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+}
+
+# default page size of list endpoints and the upper bound
+# for the ?page_size= query parameter.
+RECIPE_API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", 50))
+RECIPE_API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", 100))
+
+# serve list and retrieve requests of the recipe api with async
+# views (recipe.api._async). only useful under an ASGI server.
+RECIPE_ASYNC_VIEWS = os.environ.get("RECIPE_ASYNC_VIEWS", "") == "1"
+
+# upper bound of items in a single bulk request.
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get("API_BULK_MAX_ITEMS", 500))
+
+# reject tag and ingredient names the owner already uses.
+RECIPE_UNIQUE_NAMES_PER_OWNER = os.environ.get(
+    "RECIPE_UNIQUE_NAMES_PER_OWNER", "") == "1"
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+# local memory backend is LRU, culls the least recently used
+# entries once MAX_ENTRIES is reached.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "recipe-api"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000)),
+        },
+    }
+}
+
+# cache alias and lifetime of the per user api response cache.
+RECIPE_CACHE_ALIAS = "default"
+RECIPE_CACHE_TIMEOUT = int(os.environ.get("RECIPE_CACHE_TIMEOUT", 300))
+
+# owners with more tag or ingredient names than this are
+# autocompleted from the database instead of an in memory trie.
+RECIPE_AUTOCOMPLETE_MAX_NAMES = int(
+    os.environ.get("RECIPE_AUTOCOMPLETE_MAX_NAMES", 5000))
+
+# in process cache of token authentication lookups. revocations
+# evict the cache of the process handling them only, other processes
+# keep accepting a deleted token for up to TOKEN_CACHE_TTL seconds.
+TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 60))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+# lifetime in seconds of the tokens issued by obtain-token, and the
+# devices a user may be logged in from before the oldest is dropped.
+DEVICE_TOKEN_TTL = int(os.environ.get("DEVICE_TOKEN_TTL", 30 * 24 * 3600))
+DEVICE_TOKEN_MAX_DEVICES = int(os.environ.get("DEVICE_TOKEN_MAX_DEVICES", 10))
+
+# where recipe image renditions are rendered: "thread" (in process
+# worker pool), "sync" (in the request) or "queue" (left pending
+# for the process_images command).
+RECIPE_IMAGE_PROCESSING = os.environ.get("RECIPE_IMAGE_PROCESSING", "thread")
+RECIPE_IMAGE_WORKERS = int(os.environ.get("RECIPE_IMAGE_WORKERS", 2))
+
+# recipe image uploads above these limits are rejected
+# while streaming, before the body is stored.
+RECIPE_IMAGE_MAX_BYTES = int(os.environ.get("RECIPE_IMAGE_MAX_BYTES", 10485760))
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get("RECIPE_IMAGE_MAX_PIXELS", 40000000))
+
+# per view request metrics, served at /metrics/ in the prometheus
+# text format to these comma separated addresses or networks.
+METRICS_ALLOWED_IPS = [
+    network.strip() for network in os.environ.get(
+        "METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if network.strip()]
+
+# requests slower than this (milliseconds) are logged with their
+# slowest sql statements, 0 disables the log.
+METRICS_SLOW_REQUEST_MS = int(os.environ.get("METRICS_SLOW_REQUEST_MS", 0))
@@ -1,2 +1,3 @@
 from .create_user import CreateUser  # noqa
 from .manage_user import ManageUser  # noqa
+from .obtain_token import ObtainToken  # noqa
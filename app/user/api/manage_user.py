@@ -1,6 +1,11 @@
+import hashlib
+import json
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from rest_framework import generics
 from rest_framework import permissions
-from rest_framework import authentication
+from rest_framework.response import Response
+from ..authentication import CachedTokenAuthentication
 from ..serializers import UserSerializer
 
 
@@ -8,9 +13,33 @@ class ManageUser(generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """Return authenticated user."""
         return self.request.user
+
+    def get_etag(self, data):
+        "etag of the user representation."
+        state = json.dumps([self.request.user.pk, data], sort_keys=True,
+                           default=str)
+        return quote_etag(hashlib.md5(state.encode()).hexdigest())
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        answers fresh client copies with 304. the user comes from
+        the token cache, so neither needs a query.
+        """
+        data = self.get_serializer(self.get_object()).data
+        etag = self.get_etag(data)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(data)
+        response["ETag"] = etag
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response["ETag"] = self.get_etag(response.data)
+        return response
@@ -0,0 +1,21 @@
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
+from core.models import DeviceToken
+from ..serializers import AuthTokenSerializer
+
+
+class ObtainToken(ObtainAuthToken):
+    """
+    Issue an expiring token for the device of the user.
+    Logging in again from a device replaces its token.
+    """
+    serializer_class = AuthTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(
+            data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        token, key = DeviceToken.objects.issue(
+            serializer.validated_data['user'],
+            serializer.validated_data['device'])
+        return Response({'token': key, 'expires_at': token.expires_at})
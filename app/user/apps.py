@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class UserConfig(AppConfig):
     name = 'user'
+
+    def ready(self):
+        """
+        connect the token cache invalidation signals and load the
+        password validators, the common password list would be read
+        by the first registration of every worker otherwise.
+        """
+        from django.contrib.auth.password_validation import (
+            get_default_password_validators)
+        from . import signals  # noqa
+        get_default_password_validators()
@@ -0,0 +1,188 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from core.aio import fetch_one
+from core.models import DeviceToken, token_digest
+
+
+class TokenCache:
+    """
+    bounded in process cache of token key to user resolutions.
+    entries expire after TOKEN_CACHE_TTL seconds and the least
+    recently used entries are evicted past TOKEN_CACHE_MAX_ENTRIES.
+    the signals only evict the entries of their own process, so the
+    TTL is how long a revoked token may still authenticate on the
+    other processes.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        # user pk to the cached keys of the user.
+        self._user_keys = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, "TOKEN_CACHE_TTL", 60)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, "TOKEN_CACHE_MAX_ENTRIES", 10000)
+
+    def get(self, key):
+        "returns the cached (user, token) pair of the key or None."
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._user_keys.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def evict_token(self, key):
+        "drop the entry of a token key."
+        with self._lock:
+            self._remove(key)
+
+    def evict_user(self, user_id):
+        "drop every entry resolving to the user."
+        with self._lock:
+            for key in self._user_keys.pop(user_id, ()):
+                del self._entries[key]
+
+    def _remove(self, key):
+        "drop the entry of the key and its index, the lock held."
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._user_keys[entry[1].pk]
+        keys.discard(key)
+        if not keys:
+            del self._user_keys[entry[1].pk]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def stats(self):
+        "hit, miss and eviction counters of the cache."
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    token authentication resolving token keys from the
+    in process token cache before querying the database.
+    """
+
+    def get_token_key(self, request):
+        "token key of the authorization header, None without one."
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. No credentials provided.'))
+        elif len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain spaces.'))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain invalid characters.'))
+
+    def authenticate(self, request):
+        key = self.get_token_key(request)
+        if key is None:
+            return None
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        """
+        the user and token of a device token key, or else of a
+        legacy rest framework token key.
+        """
+        cached = self.get_cached(key)
+        if cached is None:
+            try:
+                token = DeviceToken.objects.get_by_key(key)
+            except DeviceToken.DoesNotExist:
+                user, token = super().authenticate_credentials(key)
+            else:
+                user = self.check_user(token)
+            token_cache.set(key, user, token)
+        else:
+            user, token = cached
+        # every request gets its own instance, views may modify it.
+        return copy.copy(user), token
+
+    async def aauthenticate(self, request):
+        "authenticate, reading cache misses with the async orm."
+        key = self.get_token_key(request)
+        if key is None:
+            return None
+        cached = self.get_cached(key)
+        if cached is None:
+            try:
+                token = await fetch_one(
+                    DeviceToken.objects.select_related("user"),
+                    digest=token_digest(key), expires_at__gt=timezone.now())
+            except DeviceToken.DoesNotExist:
+                model = self.get_model()
+                try:
+                    token = await fetch_one(
+                        model.objects.select_related("user"), key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user = self.check_user(token)
+            token_cache.set(key, user, token)
+        else:
+            user, token = cached
+        return copy.copy(user), token
+
+    def get_cached(self, key):
+        "cached (user, token) pair of the key, None once expired."
+        cached = token_cache.get(key)
+        if cached is not None and getattr(cached[1], "is_expired", False):
+            token_cache.evict_token(key)
+            return None
+        return cached
+
+    def check_user(self, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        return token.user
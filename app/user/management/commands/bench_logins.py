@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from recipe.management.commands._bench import create_owner, percentiles
+
+PASSWORD = "bench-Secret-4711"
+
+
+def preferred(profile):
+    "PASSWORD_HASHERS with the hasher of the profile first."
+    hasher = settings.PASSWORD_HASHER_PROFILES[profile]
+    return [hasher] + [
+        other for other in settings.PASSWORD_HASHERS if other != hasher]
+
+
+class Command(BaseCommand):
+    """
+    logins per second through obtain-token for every password hasher
+    profile, with the password checks inline and in the pool.
+    "per cpu s" divides the logins by the cpu time the process used,
+    the logins one core sustains. rejected counts the 429 answers
+    of a full pool. the users are committed and deleted afterwards.
+    """
+    help = "Benchmark obtain-token logins per hasher profile and mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", default=",".join(settings.PASSWORD_HASHER_PROFILES),
+            help="comma separated hasher profiles, missing libraries "
+                 "are skipped.")
+        parser.add_argument("--modes", default="inline,pool")
+        parser.add_argument("--users", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="pool threads.")
+        parser.add_argument(
+            "--queue", type=int, default=None,
+            help="pool queue limit, every request fits by default.")
+
+    def handle(self, *args, **options):
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        concurrency = options["concurrency"]
+        if connection.vendor == "sqlite" and concurrency > 1:
+            # every login writes its device token, sqlite locks the
+            # database for concurrent writers.
+            self.stderr.write("SQLite: logins are sent one at a time.")
+            concurrency = 1
+        queue = options["queue"]
+        if queue is None:
+            queue = concurrency
+        self.stdout.write(
+            f"{'profile':<8} {'mode':<7} {'logins/s':>9} {'per cpu s':>10} "
+            f"{'p95 ms':>8} {'rejected':>9}")
+        try:
+            for profile in options["profiles"].split(","):
+                with override_settings(PASSWORD_HASHERS=preferred(profile)):
+                    if not self.available():
+                        self.stdout.write(f"{profile:<8} library missing")
+                        continue
+                    emails = self.create_users(
+                        f"{prefix}{profile}-", options["users"])
+                    for mode in options["modes"].split(","):
+                        with override_settings(
+                                ALLOWED_HOSTS=[
+                                    *settings.ALLOWED_HOSTS, "testserver"],
+                                LOGIN_PASSWORD_CHECKS=mode,
+                                LOGIN_POOL_WORKERS=options["workers"],
+                                LOGIN_POOL_QUEUE=queue):
+                            self.report(profile, mode, self.run(
+                                emails, options["requests"], concurrency))
+        finally:
+            get_user_model().objects.filter(
+                email__startswith=prefix).delete()
+
+    def available(self):
+        hasher = get_hasher()
+        if getattr(hasher, "library", None) is None:
+            return True
+        try:
+            hasher._load_library()
+        except ValueError:
+            return False
+        return True
+
+    def create_users(self, prefix, count):
+        emails = [f"{prefix}{index}@example.com" for index in range(count)]
+        for email in emails:
+            create_owner(email=email, password=PASSWORD)
+        return emails
+
+    def run(self, emails, requests, concurrency):
+        "(status, seconds) of the logins, cpu seconds and wall seconds."
+        url = reverse("user:obtain-token")
+        results, errors = [], []
+        lock = threading.Lock()
+
+        def work(share):
+            client = APIClient()
+            try:
+                for email in share:
+                    start = time.perf_counter()
+                    response = client.post(
+                        url, {"email": email, "password": PASSWORD}, "json")
+                    with lock:
+                        results.append((response.status_code,
+                                        time.perf_counter() - start))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        logins = [emails[index % len(emails)] for index in range(requests)]
+        threads = [
+            threading.Thread(target=work, args=(logins[index::concurrency],))
+            for index in range(concurrency)]
+        cpu, wall = time.process_time(), time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise CommandError(
+                f"{len(errors)} login threads failed: {errors[0]!r}")
+        if len(results) != requests:
+            raise CommandError(
+                f"{requests - len(results)} of {requests} logins failed.")
+        return (results, time.process_time() - cpu,
+                time.perf_counter() - wall)
+
+    def report(self, profile, mode, run):
+        results, cpu, wall = run
+        accepted = [seconds for status, seconds in results if status == 200]
+        rejected = sum(1 for status, seconds in results if status == 429)
+        if len(accepted) + rejected != len(results):
+            raise CommandError(f"{profile} {mode}: logins failed.")
+        latency = percentiles(accepted) if accepted else {"p95": 0}
+        self.stdout.write(
+            f"{profile:<8} {mode:<7} {len(accepted) / wall:>9.1f} "
+            f"{len(accepted) / cpu:>10.1f} {latency['p95']:>8.1f} "
+            f"{rejected:>9}")
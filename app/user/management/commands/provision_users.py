@@ -0,0 +1,99 @@
+import csv
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from core.models import DeviceToken, token_digest
+
+
+class Command(BaseCommand):
+    """
+    creates users in bulk for load test environments.
+
+    users are named <prefix><n>@<domain> and share one password,
+    hashed once, so provisioning is bound by the inserts and not
+    by the hasher. existing users are left alone. with --tokens a
+    device token is issued to every user and the email,token pairs
+    are written as csv to --output. --delete removes the users of
+    the prefix again.
+    """
+    help = "Create or delete load test users in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--prefix", default="loadtest-")
+        parser.add_argument("--domain", default="example.com")
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="rows inserted per query.")
+        parser.add_argument(
+            "--tokens", action="store_true",
+            help="issue a device token to every user.")
+        parser.add_argument(
+            "--device", default="loadtest",
+            help="device name of the issued tokens.")
+        parser.add_argument(
+            "--output", help="csv file of the tokens, stdout without.")
+        parser.add_argument(
+            "--delete", action="store_true",
+            help="delete the users of the prefix instead.")
+
+    def handle(self, *args, **options):
+        UserModel = get_user_model()
+        if not options["prefix"]:
+            raise CommandError("--prefix must not be empty.")
+        if options["delete"]:
+            count, _ = UserModel.objects.filter(
+                email__startswith=options["prefix"]).delete()
+            self.stderr.write(f"Deleted {count} objects.")
+            return
+
+        emails = [
+            UserModel.objects.normalize_email(
+                f"{options['prefix']}{index}@{options['domain']}")
+            for index in range(options["count"])]
+        password = make_password(options["password"])
+        with transaction.atomic():
+            UserModel.objects.bulk_create(
+                (UserModel(email=email, password=password)
+                 for email in emails),
+                batch_size=options["batch_size"], ignore_conflicts=True)
+        self.stderr.write(f"Provisioned {len(emails)} users.")
+        if options["tokens"]:
+            self.write_tokens(self.issue_tokens(emails, options), options)
+
+    def issue_tokens(self, emails, options):
+        "(email, key) pairs of new device tokens of the users."
+        now = timezone.now()
+        expires_at = now + timedelta(
+            seconds=getattr(settings, "DEVICE_TOKEN_TTL", 30 * 24 * 3600))
+        size = options["batch_size"]
+        keys = []
+        for start in range(0, len(emails), size):
+            batch = emails[start:start + size]
+            tokens = []
+            for pk, email in get_user_model().objects.filter(
+                    email__in=batch).values_list("pk", "email"):
+                key = secrets.token_hex(20)
+                keys.append((email, key))
+                tokens.append(DeviceToken(
+                    user_id=pk, device=options["device"],
+                    digest=token_digest(key), created_at=now,
+                    expires_at=expires_at))
+            with transaction.atomic():
+                DeviceToken.objects.filter(
+                    user__email__in=batch, device=options["device"]).delete()
+                DeviceToken.objects.bulk_create(tokens)
+        return keys
+
+    def write_tokens(self, keys, options):
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                csv.writer(output).writerows(keys)
+        else:
+            csv.writer(self.stdout).writerows(keys)
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from core.models import DeviceToken
+
+
+class Command(BaseCommand):
+    """
+    deletes expired device tokens in batches.
+
+    every batch is a separate short transaction deleting at most
+    --batch-size rows by primary key, so the purge never holds
+    locks on a large part of the table or one long transaction.
+    with --legacy-days the rest framework tokens older than that
+    are purged too, they have no expiry of their own.
+    """
+    help = "Delete expired authentication tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="tokens deleted per transaction.")
+        parser.add_argument(
+            "--sleep", type=float, default=0,
+            help="seconds to pause between batches.")
+        parser.add_argument(
+            "--legacy-days", type=int,
+            help="also delete legacy tokens older than this.")
+
+    def purge(self, queryset, options):
+        "delete the queryset in batches. returns the deleted count."
+        count = 0
+        while True:
+            batch = list(queryset.order_by("pk").values_list(
+                "pk", flat=True)[:options["batch_size"]])
+            if not batch:
+                return count
+            # autocommitted, the locks of a batch end with its delete.
+            count += queryset.model.objects.filter(pk__in=batch).delete()[0]
+            if len(batch) < options["batch_size"]:
+                return count
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        count = self.purge(
+            DeviceToken.objects.filter(expires_at__lte=now), options)
+        self.stdout.write(f"Deleted {count} expired tokens.")
+        if options["legacy_days"] is not None:
+            count = self.purge(Token.objects.filter(
+                created__lte=now - timedelta(days=options["legacy_days"])),
+                options)
+            self.stdout.write(f"Deleted {count} legacy tokens.")
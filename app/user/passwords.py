@@ -0,0 +1,106 @@
+"""
+password checks of the obtain-token endpoint.
+
+with LOGIN_PASSWORD_CHECKS = "pool" the password hashes are checked
+in a bounded thread pool instead of the request thread. at most
+LOGIN_POOL_WORKERS hashes are computed at once, so login bursts can
+not take every core from the other endpoints, and logins past
+LOGIN_POOL_QUEUE waiting checks are rejected at once with 429.
+the hashers run in C and release the GIL, threads run in parallel.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+
+
+class LoginBusy(exceptions.Throttled):
+    "every password check slot is taken."
+    default_detail = _('Too many logins in progress.')
+
+
+class PasswordPool:
+    "thread pool with a bounded number of running and waiting checks."
+
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self.queue = queue
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password")
+
+    def run(self, function, *args):
+        "result of function(*args), LoginBusy when no slot is free."
+        if not self.slots.acquire(blocking=False):
+            raise LoginBusy(wait=1)
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        return future.result()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    "the pool of the current LOGIN_POOL_WORKERS and LOGIN_POOL_QUEUE."
+    global _pool
+    workers = getattr(settings, "LOGIN_POOL_WORKERS", 2)
+    queue = getattr(settings, "LOGIN_POOL_QUEUE", 16)
+    with _pool_lock:
+        if _pool is None or (_pool.workers, _pool.queue) != (workers, queue):
+            if _pool is not None:
+                _pool.executor.shutdown(wait=False)
+            _pool = PasswordPool(workers, queue)
+        return _pool
+
+
+def verify_password(password, encoded):
+    """
+    (correct, rehashed) of the password against the encoded hash.
+    rehashed is the password hashed with the preferred hasher when
+    the hash is outdated, else None.
+    """
+    rehashed = []
+    correct = check_password(
+        password, encoded,
+        setter=lambda raw_password: rehashed.append(
+            make_password(raw_password)))
+    return correct, rehashed[0] if rehashed else None
+
+
+def hash_password(password):
+    "the password hashed in the pool with LOGIN_PASSWORD_CHECKS = pool."
+    if getattr(settings, "LOGIN_PASSWORD_CHECKS", "inline") == "pool":
+        return get_pool().run(make_password, password)
+    return make_password(password)
+
+
+def pooled_authenticate(email, password):
+    """
+    the active user with the email and password, None otherwise.
+    like ModelBackend.authenticate with the hashing in the pool,
+    including the transparent rehash of outdated hashes.
+    """
+    UserModel = get_user_model()
+    pool = get_pool()
+    try:
+        user = UserModel._default_manager.get_by_natural_key(email)
+    except UserModel.DoesNotExist:
+        # hash anyway, unknown emails must take as long as known ones.
+        pool.run(make_password, password)
+        return None
+    correct, rehashed = pool.run(verify_password, password, user.password)
+    if not correct or not user.is_active:
+        return None
+    if rehashed is not None:
+        user.password = rehashed
+        user.save(update_fields=["password"])
+    return user
@@ -1,13 +1,18 @@
+from contextlib import contextmanager
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password as auth_password_validator  # noqa
 from rest_framework import serializers
+from core.serializers import MeasuredDataMixin
 from rest_framework.authtoken.serializers import AuthTokenSerializer as BaseAuthTokenSerializer  # noqa
+from .passwords import hash_password, pooled_authenticate
 UserModel = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MeasuredDataMixin, serializers.ModelSerializer):
     """
     Serializes the user instances.
     """
@@ -16,7 +21,12 @@ class UserSerializer(serializers.ModelSerializer):
         fields = [
             "email", "password", "first_name", "last_name"
         ]
-        extra_kwargs = {"password": {"write_only": True}}
+        extra_kwargs = {
+            "password": {"write_only": True},
+            # the unique constraint is checked by the insert or update
+            # itself, see unique_email.
+            "email": {"validators": []},
+        }
 
     def validate_password(self, value):
         """
@@ -29,17 +39,59 @@ class UserSerializer(serializers.ModelSerializer):
         except serializers.ValidationError:
             raise serializers.ValidationError(self.errors['password'])
 
+    @contextmanager
+    def unique_email(self, email):
+        """
+        turns unique violations of the email into validation errors.
+        saves one query per write over a unique validator, which
+        would select the email first, and closes its race.
+        """
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError:
+            taken = UserModel.objects.filter(
+                email=UserModel.objects.normalize_email(email))
+            if self.instance is not None:
+                taken = taken.exclude(pk=self.instance.pk)
+            if email is None or not taken.exists():
+                raise
+            # the message of the rest framework unique validator.
+            field = UserModel._meta.get_field("email")
+            message = field.error_messages["unique"] % {
+                "model_name": UserModel._meta.verbose_name,
+                "field_label": field.verbose_name}
+            raise serializers.ValidationError(
+                {"email": [message]}, code="unique")
+
     def create(self, validated_data):
         """
         Create new user with validated data.
         uses the create_user method of the defined user model
         instead of the default model create method."""
-        return get_user_model().objects.create_user(**validated_data)
+        with self.unique_email(validated_data.get("email")):
+            return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
+        """
+        saves only the changed fields, unchanged users are not
+        written at all.
+        """
+        changed = []
         if 'password' in validated_data:
-            instance.set_password(validated_data.pop('password'))
-        return super().update(instance, validated_data)
+            password = validated_data.pop('password')
+            instance.password = hash_password(password)
+            # as set_password, for the password_changed hooks.
+            instance._password = password
+            changed.append('password')
+        for attr, value in validated_data.items():
+            if getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed.append(attr)
+        if changed:
+            with self.unique_email(validated_data.get("email")):
+                instance.save(update_fields=changed)
+        return instance
 
 
 class AuthTokenSerializer(BaseAuthTokenSerializer):
@@ -50,6 +102,8 @@ class AuthTokenSerializer(BaseAuthTokenSerializer):
     Username field has been deprecated.
     """
     email = serializers.EmailField(label=_('email'))
+    device = serializers.CharField(
+        label=_('device'), max_length=100, required=False, default='')
     username = None
 
     def validate(self, attrs):
@@ -57,8 +111,11 @@ class AuthTokenSerializer(BaseAuthTokenSerializer):
         password = attrs.get('password')
 
         if email and password:
-            user = authenticate(request=self.context.get('request'),
-                                email=email, password=password)
+            if getattr(settings, "LOGIN_PASSWORD_CHECKS", "inline") == "pool":
+                user = pooled_authenticate(email, password)
+            else:
+                user = authenticate(request=self.context.get('request'),
+                                    email=email, password=password)
 
             # The authenticate call simply returns None for is_active=False
             # users. (Assuming the default ModelBackend authentication
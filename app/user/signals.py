@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from core.models import DeviceToken
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    "deleted tokens must stop authenticating immediately."
+    token_cache.evict_token(instance.key)
+
+
+@receiver(post_save, sender=DeviceToken)
+@receiver(post_delete, sender=DeviceToken)
+def evict_rotated_tokens(sender, instance, **kwargs):
+    """
+    rotated or deleted device keys must stop authenticating immediately.
+    the cache holds keys, not digests, so the user is evicted.
+    """
+    token_cache.evict_user(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def evict_changed_user(sender, instance, **kwargs):
+    "changed, deactivated or deleted users are resolved again."
+    token_cache.evict_user(instance.pk)
@@ -0,0 +1,106 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from django.urls import reverse
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from ..authentication import token_cache
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Tests for the cached token authentication backend.
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="supersecret")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_resolved_from_cache(self):
+        """
+        Test second request does not query the token table.
+        """
+        self.client.get(ME_URL)
+        stats = token_cache.stats()
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(token_cache.stats()['hits'], stats['hits'] + 1)
+
+    def test_deleted_token_rejected(self):
+        """
+        Test deleting a token invalidates the cached entry.
+        """
+        self.client.get(ME_URL)
+        self.token.delete()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """
+        Test deactivating a user invalidates the cached entry.
+        """
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_change_through_me_is_visible(self):
+        """
+        Test updating the user through me is seen by the next request.
+        """
+        self.client.patch(ME_URL, {"first_name": "updated"}, "json")
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['first_name'], "updated")
+
+    @override_settings(TOKEN_CACHE_MAX_ENTRIES=1)
+    def test_cache_is_bounded(self):
+        """
+        Test least recently used entries are evicted.
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        other_token = Token.objects.create(user=other)
+        self.client.get(ME_URL)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {other_token.key}")
+        self.client.get(ME_URL)
+        self.assertEqual(token_cache.stats()['size'], 1)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_evict_user_keeps_other_users(self):
+        """
+        Test evicting a user drops only the keys of the user.
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        token_cache.set("a", self.user, self.token)
+        token_cache.set("b", self.user, self.token)
+        token_cache.set("c", other, None)
+        token_cache.evict_user(self.user.pk)
+        self.assertIsNone(token_cache.get("a"))
+        self.assertIsNone(token_cache.get("b"))
+        self.assertEqual(token_cache.get("c"), (other, None))
+        token_cache.evict_user(other.pk)
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    @override_settings(TOKEN_CACHE_MAX_ENTRIES=1)
+    def test_evicted_keys_leave_the_user_index(self):
+        """
+        Test keys dropped past the maximum are not evicted again.
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="supersecret")
+        token_cache.set("a", self.user, self.token)
+        token_cache.set("b", other, None)
+        token_cache.set("a", other, None)
+        self.assertEqual(token_cache._user_keys, {other.pk: {"a"}})
@@ -0,0 +1,43 @@
+import csv
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from ..authentication import token_cache
+
+ME_URL = reverse('user:me')
+
+
+class ProvisionUsersTests(TestCase):
+    """
+    Tests for the provision_users command.
+    """
+
+    def provision(self, **options):
+        out = StringIO()
+        call_command("provision_users", stdout=out, stderr=StringIO(),
+                     **options)
+        return list(csv.reader(StringIO(out.getvalue())))
+
+    def test_provision_users(self):
+        """
+        Test users are created once and their tokens authenticate.
+        """
+        token_cache.clear()
+        self.provision(count=3, batch_size=2)
+        rows = self.provision(count=5, batch_size=2, tokens=True)
+
+        users = get_user_model().objects.filter(email__startswith='loadtest-')
+        self.assertEqual(users.count(), 5)
+        self.assertTrue(users.first().check_password('loadtest-password'))
+        self.assertEqual(len(rows), 5)
+        email, key = rows[0]
+        res = APIClient().get(ME_URL, HTTP_AUTHORIZATION=f"Token {key}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], email)
+
+        self.provision(delete=True)
+        self.assertFalse(users.exists())
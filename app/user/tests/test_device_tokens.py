@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.models import DeviceToken, token_digest
+from ..authentication import token_cache
+
+OBTAIN_TOKEN_URL = reverse('user:obtain-token')
+ME_URL = reverse('user:me')
+
+
+class DeviceTokenTests(TestCase):
+    """
+    Tests for the expiring per device tokens.
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.payload = {"email": "test@test.com", "password": "supersecret"}
+        self.user = get_user_model().objects.create_user(**self.payload)
+        self.client = APIClient()
+
+    def obtain(self, device=None):
+        payload = dict(self.payload)
+        if device is not None:
+            payload['device'] = device
+        res = self.client.post(OBTAIN_TOKEN_URL, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['token']
+
+    def get_me(self, key):
+        return APIClient().get(ME_URL, HTTP_AUTHORIZATION=f"Token {key}")
+
+    def test_obtain_token(self):
+        """
+        Test issued keys authenticate and are stored hashed.
+        """
+        key = self.obtain("phone")
+        token = DeviceToken.objects.get(user=self.user)
+        self.assertEqual(token.digest, token_digest(key))
+        self.assertEqual(token.device, "phone")
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(self.get_me(key).status_code, status.HTTP_200_OK)
+
+    def test_device_token_rotated(self):
+        """
+        Test logging in again replaces the token of the device only.
+        """
+        old_key = self.obtain("phone")
+        laptop_key = self.obtain("laptop")
+        self.assertEqual(self.get_me(old_key).status_code, status.HTTP_200_OK)
+        new_key = self.obtain("phone")
+
+        self.assertEqual(DeviceToken.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            self.get_me(old_key).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_me(new_key).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.get_me(laptop_key).status_code, status.HTTP_200_OK)
+
+    @override_settings(DEVICE_TOKEN_MAX_DEVICES=2)
+    def test_oldest_device_dropped(self):
+        """
+        Test the oldest devices are logged out past the maximum.
+        """
+        for device in ("a", "b", "c"):
+            self.obtain(device)
+        self.assertEqual(
+            sorted(self.user.device_tokens.values_list("device", flat=True)),
+            ["b", "c"])
+
+    def test_expired_token_rejected(self):
+        """
+        Test expired tokens fail, cached or not.
+        """
+        key = self.obtain()
+        self.assertEqual(self.get_me(key).status_code, status.HTTP_200_OK)
+        token = DeviceToken.objects.get(user=self.user)
+        token.expires_at = timezone.now() - timedelta(seconds=1)
+        # the cached token instance expires along.
+        token_cache.get(key)[1].expires_at = token.expires_at
+        DeviceToken.objects.filter(pk=token.pk).update(
+            expires_at=token.expires_at)
+
+        self.assertEqual(
+            self.get_me(key).status_code, status.HTTP_401_UNAUTHORIZED)
+        token_cache.clear()
+        self.assertEqual(
+            self.get_me(key).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """
+        Test deleting a device token invalidates the cached entry.
+        """
+        key = self.obtain("phone")
+        self.assertEqual(self.get_me(key).status_code, status.HTTP_200_OK)
+        DeviceToken.objects.filter(user=self.user).delete()
+        self.assertEqual(
+            self.get_me(key).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_legacy_token_accepted(self):
+        """
+        Test rest framework tokens still authenticate.
+        """
+        token = Token.objects.create(user=self.user)
+        self.assertEqual(self.get_me(token.key).status_code,
+                         status.HTTP_200_OK)
+
+    def test_purge_tokens(self):
+        """
+        Test the purge deletes the expired tokens in batches.
+        """
+        now = timezone.now()
+        for index in range(5):
+            DeviceToken.objects.create(
+                user=self.user, device=str(index), digest=str(index),
+                expires_at=now + timedelta(days=1 if index == 4 else -1))
+        legacy = Token.objects.create(user=self.user)
+        Token.objects.filter(pk=legacy.pk).update(
+            created=now - timedelta(days=100))
+
+        out = StringIO()
+        call_command("purge_tokens", batch_size=2, stdout=out)
+        self.assertIn("Deleted 4 expired tokens.", out.getvalue())
+        self.assertEqual(
+            list(DeviceToken.objects.values_list("device", flat=True)), ["4"])
+        self.assertTrue(Token.objects.exists())
+
+        call_command("purge_tokens", legacy_days=90, stdout=out)
+        self.assertFalse(Token.objects.exists())
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.core import checks
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from user.passwords import get_pool
+
+OBTAIN_TOKEN_URL = reverse('user:obtain-token')
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+PBKDF2_SHA1 = 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'
+
+
+@override_settings(LOGIN_PASSWORD_CHECKS="pool", LOGIN_POOL_WORKERS=1,
+                   LOGIN_POOL_QUEUE=1)
+class PooledLoginTests(TestCase):
+    """
+    Tests for password checks in the login pool.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {"email": "test@test.com", "password": "supersecret"}
+        self.user = get_user_model().objects.create_user(**self.payload)
+
+    def test_obtain_token(self):
+        """
+        Test the token is returned for valid credentials.
+        """
+        res = self.client.post(OBTAIN_TOKEN_URL, self.payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.data)
+
+    def test_invalid_credentials(self):
+        """
+        Test wrong passwords, unknown emails and inactive users fail.
+        """
+        res = self.client.post(OBTAIN_TOKEN_URL, {
+            "email": "test@test.com", "password": "wrong"}, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(OBTAIN_TOKEN_URL, {
+            "email": "unknown@test.com", "password": "wrong"}, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.post(OBTAIN_TOKEN_URL, self.payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_full_pool_rejected(self):
+        """
+        Test logins are answered with 429 while every slot is taken.
+        """
+        pool = get_pool()
+        for slot in range(2):
+            pool.slots.acquire()
+        try:
+            res = self.client.post(OBTAIN_TOKEN_URL, self.payload, "json")
+        finally:
+            pool.slots.release()
+            pool.slots.release()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '1')
+
+    def test_outdated_hash_upgraded(self):
+        """
+        Test hashes of other hashers are rehashed on login.
+        """
+        with override_settings(PASSWORD_HASHERS=[PBKDF2_SHA1, PBKDF2]):
+            self.user.set_password(self.payload['password'])
+            self.user.save()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha1$'))
+
+        res = self.client.post(OBTAIN_TOKEN_URL, self.payload, "json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+
+
+class HasherCheckTests(TestCase):
+    """
+    Tests for the password hasher system check.
+    """
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.Argon2PasswordHasher', PBKDF2])
+    def test_missing_library(self):
+        """
+        Test a preferred hasher without its library is reported.
+        """
+        with patch.object(Argon2PasswordHasher, '_load_library',
+                          side_effect=ValueError("missing")):
+            errors = checks.run_checks()
+        self.assertIn('core.E001', [error.id for error in errors])
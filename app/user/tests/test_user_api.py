@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from django.urls import reverse
 from rest_framework import status
@@ -70,9 +72,23 @@ class PublicUserApiTests(TestCase):
             CREATE_USER_URL, payload, format="json")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['email'][0].code, 'unique')
 
         self.assertEqual(get_user_model().objects.all().count(), 1)
 
+    def test_create_user_without_email_lookup(self):
+        """
+        test new users are inserted without selecting the email first.
+        """
+        payload = {"email": "test@test.com", "password": "supersecret"}
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(CREATE_USER_URL, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [query['sql'].split()[0] for query in queries.captured_queries
+             if query['sql'].split()[0] in ('SELECT', 'INSERT')],
+            ['INSERT'])
+
     def test_fail_create_user_with_numeric_passw(self):
         """
         Test creating a user with fully numeric password.
@@ -210,3 +226,44 @@ class PrivateUserApiTests(TestCase):
         res = self.client.delete(ME_URL)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(get_user_model().objects.all().count(), 0)
+
+    def get_updates(self, payload):
+        "the UPDATE statements of a PATCH of the payload."
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(ME_URL, payload, "json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in queries.captured_queries
+                if query['sql'].startswith('UPDATE')]
+
+    def test_partial_update_saves_changed_fields(self):
+        """
+        test a partial update writes only the changed columns.
+        """
+        updates = self.get_updates({"first_name": "Ada"})
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"first_name"', updates[0])
+        self.assertNotIn('"email"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Ada")
+
+    def test_unchanged_update_not_saved(self):
+        """
+        test updates without changes do not write the user.
+        """
+        self.assertEqual(self.get_updates(
+            {"email": "test@test.com", "first_name": ""}), [])
+
+    def test_conditional_retrieve(self):
+        """
+        test fresh copies of the user page are answered with 304.
+        """
+        etag = self.client.get(ME_URL)['ETag']
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.patch(ME_URL, {"last_name": "Lovelace"}, "json")
+        self.assertNotEqual(res['ETag'], etag)
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['ETag'], self.client.get(ME_URL)['ETag'])